@@ -0,0 +1,146 @@
+# ********************************************************************************
+#
+#		Constitutive Model Card Generator
+#
+#		Interpolates the modulus and yield strength of the design of experiment
+#		(doe.dat) over aspect ratio, temperature and extension rate and writes
+#		Abaqus *Material cards (orthotropic elastic, plastic and potential) in the
+#		form of the ar*_t* cards for any query points, in one vectorised pass.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'chapter-5', 'material'))
+from plla_lib import inverse3
+#
+# ********************************************************************************
+# Inputs
+# ********************************************************************************
+#
+doe_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'doe', 'doe.dat')
+#
+# Responses of doe.dat (columns 4 to 7)
+responses = ['E_md', 'ys_md', 'E_td', 'ys_td']
+#
+# Poisson's ratio, elongation at break and density of the cards (tonne/mm^3, as
+# PLLA.py)
+v1 = 0.35
+v2 = v1
+eb = 0.5
+density = 1.2e-09
+#
+# ********************************************************************************
+# Interpolant
+# ********************************************************************************
+#
+# Full-factorial data of doe.dat: levels of each factor (aspect ratio,
+# temperature, extension rate) and the responses on the grid (levels..., 4),
+# averaging any repeated runs
+def read_doe(path=doe_file):
+	with open(path, 'rb') as doeFile:
+		rows = [[float(v) for v in line.split()] for line in doeFile.read().decode('latin-1').splitlines()[1:]
+		if line.strip()]
+	data = np.array(rows)
+	levels = [np.unique(data[:,k]) for k in range(3)]
+	values = np.zeros([len(x) for x in levels] + [len(responses)])
+	count = np.zeros([len(x) for x in levels] + [1])
+	idx = tuple(np.searchsorted(levels[k], data[:,k]) for k in range(3))
+	np.add.at(values, idx, data[:,3:7])
+	np.add.at(count, idx, 1)
+	return {'levels':levels, 'values':values / count}
+#
+# Responses (n, 4) at query points by trilinear interpolation on the DOE grid,
+# linear in aspect ratio and temperature and in log extension rate. Points
+# outside the tested ranges raise ValueError.
+def interpolate(doe, ar, T, rate):
+	x = [np.atleast_1d(np.asarray(v, dtype=float)) for v in (ar, T, np.log(rate))]
+	x = np.broadcast_arrays(*x)
+	weights = []
+	for k, (xk, levels) in enumerate(zip(x, doe['levels'])):
+		grid = np.log(levels) if k == 2 else levels
+		if np.any(xk < grid[0] - 1e-9) or np.any(xk > grid[-1] + 1e-9):
+			raise ValueError('{0} outside the DOE range'.format(['ar', 'T', 'rate'][k]))
+		i = np.clip(np.searchsorted(grid, xk, side='right') - 1, 0, len(grid) - 2)
+		weights.append((i, np.clip((xk - grid[i]) / (grid[i + 1] - grid[i]), 0.0, 1.0)))
+	out = 0.0
+	for corner in range(8):
+		w = 1.0
+		idx = []
+		for k, (i, t) in enumerate(weights):
+			upper = (corner >> k) & 1
+			idx.append(i + upper)
+			w = w * (t if upper else 1 - t)
+		out = out + w[:,None] * doe['values'][tuple(idx)]
+	return out
+#
+# ********************************************************************************
+# Cards
+# ********************************************************************************
+#
+# Elastic constants (n, 9: D1111..D2323), plastic tables (n, 2, 2) and stress
+# ratios (n, 6) of responses (n, 4). As in the ar*_t* cards, direction 2 is the
+# transverse (TD) direction, the plastic table is that of the TD yield strength
+# and the potential scales the other directions by the MD to TD yield ratio.
+def card_constants(values):
+	E1, ys1, E2, ys2 = values.T
+	G1 = E1 / (2 * (1 + v1))
+	G2 = 1 / (1 / E1 + 1 / E2 + 2 * v2 / E2)
+	D11, D22, D33, D12, D13, D23 = inverse3(1 / E1, 1 / E2, 1 / E1, -v2 / E2, -v1 / E1, -v2 / E2)
+	elastic = np.column_stack((D11, D12, D22, D13, D23, D33, G2, G1, G2))
+	uts_true = ys2 * (1 + np.log(1 + eb))
+	plastic = np.zeros((len(values), 2, 2))
+	plastic[:,0,0] = ys2
+	plastic[:,1,0] = uts_true
+	plastic[:,1,1] = eb - uts_true / E2
+	potential = np.repeat((ys1 / ys2)[:,None], 6, axis=1)
+	potential[:,1] = 1.0
+	return elastic, plastic, potential
+#
+# Text of cards with plastic tables of the given number of points, as a %
+# template of one card: elastic constants (9), plastic stress and strain pairs
+# and potential (6). Cards end with a null character, for splitting.
+def card_template(points, name='CUSTOM'):
+	lines = ['*Material, name={0}'.format(name), '*Density', ' {0!r}'.format(density),
+	'*Elastic, type=ORTHOTROPIC', ' ' + ', '.join(['%r'] * 8), ' %r', '*Plastic']
+	lines += [' %.1f, %.5f'] * points
+	lines += ['*Potential', ' ' + ', '.join(['%.2f'] * 6)]
+	return '\n'.join(lines) + '\n\0'
+#
+# Cards of elastic (n, 9), plastic (n, points, 2) and potential (n, 6) arrays,
+# formatted in one pass over the repeated template
+def format_cards(elastic, plastic, potential, name='CUSTOM'):
+	n = len(elastic)
+	table = np.column_stack((elastic, np.reshape(plastic, (n, -1)), potential))
+	text = (card_template(np.shape(plastic)[1], name) * n) % tuple(table.ravel().tolist())
+	return text.split('\0')[:-1]
+#
+def format_card(elastic, plastic, potential, name='CUSTOM'):
+	return format_cards(np.atleast_2d(elastic), np.asarray(plastic)[None], np.atleast_2d(potential), name)[0]
+#
+# Cards of the query points (ar, T, rate arrays), written to folder as
+# ar{ar}_t{T}_r{rate} files where folder is given
+def generate_cards(ar, T, rate, folder=None, doe=None):
+	doe = doe or read_doe()
+	values = interpolate(doe, ar, T, rate)
+	cards = format_cards(*card_constants(values))
+	if folder is not None:
+		points = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=float)) for v in (ar, T, rate)])
+		for card, a, t, r in zip(cards, *points):
+			with open(os.path.join(folder, 'ar{0:g}_t{1:g}_r{2:g}'.format(a, t, r)), 'w') as cardFile:
+				cardFile.write(card)
+	return cards
+#
+# Usage: python card_gen.py ar T rate [folder]
+if __name__ == '__main__':
+	if len(sys.argv) < 4:
+		print('Usage: python card_gen.py ar T rate [folder]')
+		sys.exit(1)
+	ar, T, rate = [float(v) for v in sys.argv[1:4]]
+	print(generate_cards(ar, T, rate, sys.argv[4] if len(sys.argv) > 4 else None)[0])
+#
+# ********************************************************************************
@@ -0,0 +1,123 @@
+# ********************************************************************************
+#
+#		Constitutive Model Card Index
+#
+#		Parses the Abaqus *Material cards of this directory (ar{ar}_t{T} and the
+#		ar{ar}_t{T}_r{rate} cards of card_gen.py) into packed arrays: densities,
+#		elastic constants and potentials per card, and the plastic curves of all
+#		cards in one array with offsets, with lookup by (ar, T) and vectorised
+#		flow stress at any plastic strain.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import os
+import re
+import numpy as np
+#
+card_dir = os.path.dirname(os.path.abspath(__file__))
+card_name = re.compile(r'^ar([\d.]+)_t([\d.]+)(?:_r([\d.]+))?$')
+#
+# ********************************************************************************
+# Parser
+# ********************************************************************************
+#
+# Keyword blocks of a card: {keyword: (options, rows)}, keywords in upper case
+# and data lines as lists of floats
+def parse_card(text):
+	blocks = {}
+	rows = None
+	for line in text.splitlines():
+		line = line.strip()
+		if not line or line.startswith('**'):
+			continue
+		if line.startswith('*'):
+			parts = [part.strip() for part in line[1:].split(',')]
+			rows = []
+			blocks[parts[0].upper()] = (parts[1:], rows)
+		elif rows is not None:
+			rows.append([float(v) for v in line.split(',') if v.strip()])
+	return blocks
+#
+# ********************************************************************************
+# Index
+# ********************************************************************************
+#
+# Cards of a directory, in name order:
+#   keys [(ar, T, rate)]        rate None for the hand-made cards
+#   density (n,), elastic (n, 9), potential (n, 6)
+#   shear_compliance (n,)        cards written with 1/G in D1212 and D2323
+#   stress, strain (total points,) plastic curves, card k in offsets[k]:offsets[k+1]
+# The hand-made cards hold the compliance 1/G in D1212 and D2323 (columns 6 and
+# 8) and the card_gen.py cards the modulus G; elastic always holds the modulus.
+class CardIndex(object):
+	def __init__(self, folder=card_dir):
+		self.names = []
+		self.keys = []
+		density, elastic, potential, curves = [], [], [], []
+		compliance = []
+		for name in sorted(os.listdir(folder)):
+			m = card_name.match(name)
+			if m is None:
+				continue
+			with open(os.path.join(folder, name), 'r') as cardFile:
+				blocks = parse_card(cardFile.read())
+			self.names.append(name)
+			self.keys.append((float(m.group(1)), float(m.group(2)),
+			None if m.group(3) is None else float(m.group(3))))
+			density.append(blocks['DENSITY'][1][0][0])
+			elastic.append(sum(blocks['ELASTIC'][1], []))
+			compliance.append(m.group(3) is None)
+			potential.append(blocks['POTENTIAL'][1][0])
+			curves.append(np.array(blocks['PLASTIC'][1], dtype=float).reshape(-1, 2))
+		self.density = np.array(density, dtype=float)
+		self.elastic = np.array(elastic, dtype=float).reshape(-1, 9)
+		self.shear_compliance = np.array(compliance, dtype=bool)
+		shear = np.ix_(self.shear_compliance, [6, 8])
+		self.elastic[shear] = 1.0 / self.elastic[shear]
+		self.potential = np.array(potential, dtype=float).reshape(-1, 6)
+		self.offsets = np.cumsum([0] + [len(c) for c in curves])
+		packed = np.vstack(curves) if curves else np.zeros((0, 2))
+		self.stress = packed[:,0].copy()
+		self.strain = packed[:,1].copy()
+		#
+		# Strains shifted by card so that all curves sort as one array
+		self._shift = np.ceil(self.strain.max() + 1.0) if len(packed) else 1.0
+		self._card = np.repeat(np.arange(len(curves)), np.diff(self.offsets))
+		self._packed = self.strain + self._card * self._shift
+		self._lookup = dict((key, k) for k, key in enumerate(self.keys))
+		self._lookup.update(((ar, T), k) for k, (ar, T, rate) in enumerate(self.keys) if rate is None)
+	#
+	def __len__(self):
+		return len(self.keys)
+	#
+	# Index of the card of (ar, T) or (ar, T, rate), or KeyError
+	def lookup(self, ar, T, rate=None):
+		return self._lookup[(ar, T) if rate is None else (ar, T, rate)]
+	#
+	# Plastic curve (points, 2) of card k (a copy of the stored stress and strain)
+	def curve(self, k):
+		return np.column_stack((self.stress[self.offsets[k]:self.offsets[k+1]],
+		self.strain[self.offsets[k]:self.offsets[k+1]]))
+	#
+	# Flow stress of cards k at plastic strains eps (broadcast together), linear
+	# between the points of each curve and constant beyond its ends, as Abaqus
+	def flow_stress(self, k, eps):
+		k, eps = np.broadcast_arrays(np.asarray(k, dtype=int), np.asarray(eps, dtype=float))
+		first = self.offsets[k]
+		last = self.offsets[k + 1] - 1
+		eps = np.clip(eps, self.strain[first], self.strain[last])
+		i = np.searchsorted(self._packed, eps + k * self._shift, side='right') - 1
+		i = np.clip(i, first, np.maximum(last - 1, first))
+		j = np.minimum(i + 1, last)
+		span = self.strain[j] - self.strain[i]
+		t = np.where(span > 0, (eps - self.strain[i]) / np.where(span > 0, span, 1.0), 0.0)
+		return self.stress[i] + t * (self.stress[j] - self.stress[i])
+	#
+	# Flow stress (cards, strains) of every card at plastic strains eps (m,)
+	def flow_stress_all(self, eps):
+		return self.flow_stress(np.arange(len(self))[:,None], np.asarray(eps, dtype=float)[None,:])
+#
+# ********************************************************************************
@@ -40,6 +40,10 @@ import visualization
 import xyPlot
 import displayGroupOdbToolset as dgo
 import connectorBehavior
+import sys
+import numpy as np
+from model_meta import node_sets, write_meta
+from feature_lookup import part_index, lookup, load_features, save_features, check_baseline, record_path
 #
 # ********************************************************************************
 # Material models
@@ -86,11 +90,11 @@ del s
 #
 # Reference points
 p = m.parts['BALLOON']
-p.ReferencePoint(point=(0.0, 0.0, 0.0))
+balloonRP = p.ReferencePoint(point=(0.0, 0.0, 0.0)).id
 #
 # Sets (pre-mesh) and section assignment
 p.Set(faces=p.faces.getByBoundingBox(-10,-10,-10,10,10,10), 
-name='BODY', referencePoints=(p.referencePoints[2], ))
+name='BODY', referencePoints=(p.referencePoints[balloonRP], ))
 m.HomogeneousShellSection(idealization=NO_IDEALIZATION, 
 integrationRule=SIMPSON, material='PET', name='BALLOON', numIntPts=5, 
 poissonDefinition=DEFAULT, preIntegrate=OFF, temperature=GRADIENT, thickness=0.02, 
@@ -141,93 +145,58 @@ geometryFile=mdb.acis, name='MULTILINK-STENT', type=DEFORMABLE_BODY)
 # Delete additional models generated by Abaqus
 del m.parts['Multilink Stent (Half)-1']
 #
-# Calculate total number of vertices
+# Feature index of the imported part (vertices, edge midpoints, faces). Features
+# without a geometric rule (the datum planes) are found from the positions of
+# the baseline features in stent_features.npz where it is kept with the scripts,
+# and otherwise by their baseline indices. It is recorded from the baseline
+# indices by running the baseline design with
+# abaqus cae noGUI=csa_in.py -- record {scripts folder}
 p = m.parts['MULTILINK-STENT']
-numbervertices = p.vertices[-1].index
-#
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[234], 
-point2 = p.vertices[235], 
-point3 = p.vertices[208])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[466], 
-point2 = p.vertices[314], 
-point3 = p.vertices[309])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[356], 
-point2 = p.vertices[361], 
-point3 = p.vertices[249])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[327], 
-point2 = p.vertices[343], 
-point3 = p.vertices[263])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[321], 
-point2 = p.vertices[304], 
-point3 = p.vertices[170])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[455], 
-point2 = p.vertices[301], 
-point3 = p.vertices[296])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[338], 
-point2 = p.vertices[270], 
-point3 = p.vertices[237])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[435], 
-point2 = p.vertices[431], 
-point3 = p.vertices[426])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[286], 
-point2 = p.vertices[291], 
-point3 = p.vertices[192])
-#
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[149], 
-point2 = p.vertices[130], 
-point3 = p.vertices[498])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[190], 
-point2 = p.vertices[189], 
-point3 = p.vertices[406])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[140], 
-point2 = p.vertices[139], 
-point3 = p.vertices[487])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[240], 
-point2 = p.vertices[241], 
-point3 = p.vertices[278])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[178], 
-point2 = p.vertices[179], 
-point3 = p.vertices[396])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[214], 
-point2 = p.vertices[213], 
-point3 = p.vertices[443])
-#
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[379], 
-point2 = p.vertices[421], 
-point3 = p.vertices[229])
-p.DatumPlaneByThreePoints(
-point1 = p.vertices[313], 
-point2 = p.vertices[430], 
-point3 = p.vertices[99])
+recordFeatures = 'record' in sys.argv
+if recordFeatures:
+	check_baseline()
+	featuresPath = record_path(sys.argv)
+	reference = {}
+else:
+	reference = load_features()
+index = part_index(p)
+features = lookup(index, {
+'PLANE 1':('vertex', (234, 235, 208)),
+'PLANE 2':('vertex', (466, 314, 309)),
+'PLANE 3':('vertex', (356, 361, 249)),
+'PLANE 4':('vertex', (327, 343, 263)),
+'PLANE 5':('vertex', (321, 304, 170)),
+'PLANE 6':('vertex', (455, 301, 296)),
+'PLANE 7':('vertex', (338, 270, 237)),
+'PLANE 8':('vertex', (435, 431, 426)),
+'PLANE 9':('vertex', (286, 291, 192)),
+'PLANE 10':('vertex', (149, 130, 498)),
+'PLANE 11':('vertex', (190, 189, 406)),
+'PLANE 12':('vertex', (140, 139, 487)),
+'PLANE 13':('vertex', (240, 241, 278)),
+'PLANE 14':('vertex', (178, 179, 396)),
+'PLANE 15':('vertex', (214, 213, 443)),
+'PLANE 16':('vertex', (379, 421, 229)),
+'PLANE 17':('vertex', (313, 430, 99)),
+'OFFSET':('vertex', (285, 337)),
+'EDGE PLANE 1':('edge', (605, 372, 226)),
+'EDGE PLANE 2':('edge', (222, 198, 595))}, reference, record=recordFeatures)
+#
+for k in range(1, 18):
+	v1, v2, v3 = features['PLANE {0}'.format(k)]
+	p.DatumPlaneByThreePoints(point1=p.vertices[v1], point2=p.vertices[v2], point3=p.vertices[v3])
 #
 p.DatumPlaneByPrincipalPlane(offset=0.0, principalPlane=XYPLANE)
-plane_offset = fabs(p.vertices[285].pointOn[0][2]) - fabs(p.vertices[337].pointOn[0][2])
+v1, v2 = features['OFFSET']
+plane_offset = fabs(p.vertices[v1].pointOn[0][2]) - fabs(p.vertices[v2].pointOn[0][2])
 p.DatumPlaneByPrincipalPlane(offset=plane_offset, principalPlane=XYPLANE)
 p.DatumPlaneByPrincipalPlane(offset=-plane_offset, principalPlane=XYPLANE)
-p.DatumPlaneByThreePoints(
-point1=p.InterestingPoint(p.edges[605], MIDDLE), 
-point2=p.InterestingPoint(p.edges[372], MIDDLE), 
-point3=p.InterestingPoint(p.edges[226], MIDDLE))
-p.DatumPlaneByThreePoints(
-point1=p.InterestingPoint(p.edges[222], MIDDLE), 
-point2=p.InterestingPoint(p.edges[198], MIDDLE), 
-point3=p.InterestingPoint(p.edges[595], MIDDLE))
+for name in ('EDGE PLANE 1', 'EDGE PLANE 2'):
+	e1, e2, e3 = features[name]
+	p.DatumPlaneByThreePoints(
+	point1=p.InterestingPoint(p.edges[e1], MIDDLE), 
+	point2=p.InterestingPoint(p.edges[e2], MIDDLE), 
+	point3=p.InterestingPoint(p.edges[e3], MIDDLE))
 p.DatumPlaneByPrincipalPlane(offset=0.0, principalPlane=YZPLANE)
 #
 # Partition cells using datum planes
@@ -237,7 +206,7 @@ for i in numberdatumplanes:
 	cells=p.cells.getByBoundingBox(-10,-10,-10,10,10,10),datumPlane=p.datums[i])
 #
 # Reference Point
-p.ReferencePoint(point=(0.0, 0.0, 0.0))
+stentRP = p.ReferencePoint(point=(0.0, 0.0, 0.0)).id
 #
 # Sets (pre-mesh) and section assignment
 p.Set(cells=p.cells.getByBoundingBox(-10,-10,-10,10,10,10), name='BODY')
@@ -245,32 +214,48 @@ m.HomogeneousSolidSection(material='PLLA', name='STENT', thickness=None)
 p.SectionAssignment(offset=0.0, offsetField='', offsetType=MIDDLE_SURFACE, region=
 p.sets['BODY'], sectionName='STENT', thicknessAssignment=FROM_SECTION)
 #
-# Selecting surfaces of stent
-# s = p.faces.findAt(((x_value, y_value, z_value), ))
-innersurface = p.faces[585].getFacesByFaceAngle(angle=20.0)
+# Feature index of the partitioned part (the partitions renumber its topology).
+# The centre vertices are those on the mid plane and inner radius nearest 0, 120
+# and 240 degrees.
+index = part_index(p)
+features = lookup(index, {
+'LEFT RP':('edge', (571, 587)),
+'RIGHT RP':('edge', (234, 228)),
+'CENTRE':('vertex', (348, 362, 353), lambda index: index.vertices_at(0.0, index.r_in,
+np.arange(3) * 2 * np.pi / 3))}, reference, record=recordFeatures)
+if recordFeatures:
+	save_features(reference, featuresPath)
+#
+# Selecting surfaces of stent: faces on the inner and outer radius
+innerface = index.radial_face()
+outerface = index.radial_face(outer=True)
+innersurface = p.faces[innerface].getFacesByFaceAngle(angle=20.0)
 p.Surface(name='INNER', side1Faces=innersurface)
-outersurface = p.faces[512].getFacesByFaceAngle(angle=20.0)
+outersurface = p.faces[outerface].getFacesByFaceAngle(angle=20.0)
 p.Surface(name='OUTER', side1Faces=outersurface)
-totalsurface = p.faces[512].getFacesByFaceAngle(angle=90.0)
+totalsurface = p.faces[outerface].getFacesByFaceAngle(angle=90.0)
 p.Surface(name='TOTAL', side1Faces=totalsurface)
 #
+# Axial edge (along +z) for rigid part orientation
+axialedge = index.aligned_edge()
+#
 # Datum points
-p.DatumPointByMidPoint(
-point1=p.InterestingPoint(p.edges[571], MIDDLE), 
-point2=p.InterestingPoint(p.edges[587], MIDDLE))
-p.DatumPointByMidPoint(
-point1=p.InterestingPoint(p.edges[234], MIDDLE), 
-point2=p.InterestingPoint(p.edges[228], MIDDLE))
+datumPoints = []
+for name in ('LEFT RP', 'RIGHT RP'):
+	e1, e2 = features[name]
+	datumPoints.append(p.DatumPointByMidPoint(
+	point1=p.InterestingPoint(p.edges[e1], MIDDLE), 
+	point2=p.InterestingPoint(p.edges[e2], MIDDLE)).id)
 #
 # ********************************************************************************
 # Orientation
 # ********************************************************************************
 #
-p.DatumCsysByThreePoints(coordSysType=CYLINDRICAL, name='CYLCSYS', 
-origin=(0.0, 0.0, 0.0), point1=(1.0, 0.0, 0.0), point2=(1.0, 1.0, 0.0))
+cylcsys = p.DatumCsysByThreePoints(coordSysType=CYLINDRICAL, name='CYLCSYS', 
+origin=(0.0, 0.0, 0.0), point1=(1.0, 0.0, 0.0), point2=(1.0, 1.0, 0.0)).id
 #
 p.MaterialOrientation(additionalRotationField='', additionalRotationType=ROTATION_NONE, 
-angle=0.0, axis=AXIS_3, fieldName='', localCsys=p.datums[55], orientationType=SYSTEM
+angle=0.0, axis=AXIS_3, fieldName='', localCsys=p.datums[cylcsys], orientationType=SYSTEM
 , region=Region(cells=p.cells.getByBoundingBox(-10,-10,-10,10,10,10)), stackDirection=STACK_3)
 #
 # ********************************************************************************
@@ -286,14 +271,15 @@ p.generateMesh()
 p.Set(name='ALL NODES', 
 nodes=p.nodes.getByBoundingBox(-10,-10,-10,10,10,10))
 #
-c1 = p.vertices[348]
-c2 = p.vertices[362]
-c3 = p.vertices[353]
+v1, v2, v3 = features['CENTRE']
+c1 = p.vertices[v1]
+c2 = p.vertices[v2]
+c3 = p.vertices[v3]
 n1 = c1.getNodes()
 n2 = c2.getNodes()
 n3 = c3.getNodes()
 p.Set(name='CENTRE NODES', nodes=(n1, n2, n3))
-c3coord = fabs(p.vertices[362].pointOn[0][0])+0.005
+c3coord = index.r_in + 0.005
 p.Set(name='INNER NODES', 
 nodes=p.nodes.getByBoundingCylinder((0,0,-10),(0,0,10),c3coord))
 #
@@ -307,7 +293,7 @@ n2 = p.nodes.getByBoundingSphere(center=(-450.E-03,779.423E-03,-2.5), radius=0.0
 n3 = p.nodes.getByBoundingSphere(center=(-450.E-03,-779.423E-03,-2.5), radius=0.0001)
 p.Set(name='END NODES R PLANAR', nodes=(n1, n2, n3))
 #
-zcoord = p.vertices[165].pointOn[0][2]
+zcoord = index.z_max
 #
 left1 = zcoord-0.0001
 left2 = zcoord+0.0001
@@ -329,19 +315,19 @@ a.DatumCsysByThreePoints(coordSysType=CYLINDRICAL, name='CYLCSYS',
 origin=(0.0, 0.0, 0.0), point1=(0.0, 0.0, -1.0), point2=(0.0, 1.0, -1.0))
 a.Instance(dependent=ON, name='MULTILINK-STENT-1', part=p)
 i = a.instances['MULTILINK-STENT-1']
-a.ReferencePoint(point=i.datums[53])
-a.ReferencePoint(point=i.datums[54])
+ctrlR = a.ReferencePoint(point=i.datums[datumPoints[0]]).id
+ctrlL = a.ReferencePoint(point=i.datums[datumPoints[1]]).id
 p = m.parts['BALLOON']
 a.Instance(dependent=ON, name='BALLOON-1', part=p)
 a.ParallelEdge(fixedAxis=
 a.instances['BALLOON-1'].edges[0], flip=ON, movableAxis=
-a.instances['MULTILINK-STENT-1'].edges[3])
-a.CoincidentPoint(fixedPoint=a.instances['BALLOON-1'].referencePoints[2]
-, movablePoint=a.instances['MULTILINK-STENT-1'].referencePoints[48])
+a.instances['MULTILINK-STENT-1'].edges[axialedge])
+a.CoincidentPoint(fixedPoint=a.instances['BALLOON-1'].referencePoints[balloonRP]
+, movablePoint=a.instances['MULTILINK-STENT-1'].referencePoints[stentRP])
 #
 # Sets in assembly (post-mesh)
-a.Set(name='CTRL R', referencePoints=(a.referencePoints[4], ))
-a.Set(name='CTRL L', referencePoints=(a.referencePoints[5], ))
+a.Set(name='CTRL R', referencePoints=(a.referencePoints[ctrlR], ))
+a.Set(name='CTRL L', referencePoints=(a.referencePoints[ctrlL], ))
 #
 # Contact
 m.ContactProperty('GENERAL')
@@ -408,97 +394,33 @@ a = m.rootAssembly
 i = a.instances['MULTILINK-STENT-1']
 p = m.parts['MULTILINK-STENT']
 #
-paramsFile = open('leftplanarnodes.txt','w')
-leftendnodes = i.sets['END NODES L PLANAR'].nodes
-for j in range(len(leftendnodes)):
-	nodelabels = leftendnodes[j].label
-	paramsFile.write(str(nodelabels) + ',')
-paramsFile.close()
-#
-paramsFile = open('rightplanarnodes.txt','w')
-leftendnodes = i.sets['END NODES R PLANAR'].nodes
-for j in range(len(leftendnodes)):
-	nodelabels = leftendnodes[j].label
-	paramsFile.write(str(nodelabels) + ',')
-paramsFile.close()
-#
-paramsFile = open('leftnodes.txt','w')
-leftendnodes = i.sets['END NODES L'].nodes
-for j in range(len(leftendnodes)):
-	nodelabels = leftendnodes[j].label
-	paramsFile.write(str(nodelabels) + ',')
-paramsFile.close()
-#
-paramsFile = open('rightnodes.txt','w')
-rightendnodes = i.sets['END NODES R'].nodes
-for j in range(len(rightendnodes)):
-	nodelabels = rightendnodes[j].label
-	paramsFile.write(str(nodelabels) + ',')
-paramsFile.close()
-#
-paramsFile = open('centrenodes.txt','w')
-centrenodes = i.sets['CENTRE NODES'].nodes
-for j in range(len(centrenodes)):
-	nodelabels = centrenodes[j].label
-	paramsFile.write(str(nodelabels) + ',')
-paramsFile.close()
-#
-paramsFile = open('innernodes.txt','w')
-innernodes = i.sets['INNER NODES'].nodes
-for j in range(len(innernodes)):
-	nodelabels = innernodes[j].label
-	paramsFile.write(str(nodelabels) + ',')
-paramsFile.close()
+sets = dict((key, [node.label for node in i.sets[name].nodes]) for key, name in node_sets)
 #
 m = mdb.models['Model-1']
 p = m.parts['MULTILINK-STENT']
 a = m.rootAssembly
 #
-leftrp = p.datums[53].pointOn
-x = leftrp[0]
-y = leftrp[1]
-z = leftrp[2]
-paramsFile = open('leftrp.txt','w')
-paramsFile.write(str(x)+ '\n' + str(y) + '\n' + str(z))
-paramsFile.close()
-#
-rightrp = p.datums[54].pointOn
-x = rightrp[0]
-y = rightrp[1]
-z = rightrp[2]
-paramsFile = open('rightrp.txt','w')
-paramsFile.write(str(x)+ '\n' + str(y) + '\n' + str(z))
-paramsFile.close()
-#
-# Face label for assembly level surface generation
-paramsFile = open('outersurfaceface.txt','w')
-paramsFile.write(str(512))
-paramsFile.close()
-#
-# Axial edge label for rigid plate orientation
-paramsFile = open('axialedge.txt','w')
-paramsFile.write(str(3))
-paramsFile.close()
+# Reference points, face label for assembly level surface generation and axial
+# edge label for rigid plate orientation
+scalars = {'leftrp':p.datums[datumPoints[0]].pointOn, 'rightrp':p.datums[datumPoints[1]].pointOn,
+'outersurfaceface':outerface, 'axialedge':axialedge}
 #
 # Outer surface area of stent
 surfaceAreaOuter = 0.0
 surfaceAreaMatrix = a.instances['MULTILINK-STENT-1'].surfaces['OUTER'].faces
 for i in range(len(surfaceAreaMatrix)):
 	surfaceAreaOuter = surfaceAreaOuter + surfaceAreaMatrix[i].getSize()
-#
-paramsFile = open('surfaceAreaOuter.txt','w')
-paramsFile.write(str(surfaceAreaOuter))
-paramsFile.close()
+scalars['surfaceAreaOuter'] = surfaceAreaOuter
 #
 # Total surface area of stent
 surfaceAreaTotal = 0.0
 surfaceAreaMatrix = a.instances['MULTILINK-STENT-1'].surfaces['TOTAL'].faces
 for i in range(len(surfaceAreaMatrix)):
 	surfaceAreaTotal = surfaceAreaTotal + surfaceAreaMatrix[i].getSize()
+scalars['surfaceAreaTotal'] = surfaceAreaTotal
 #
-paramsFile = open('surfaceAreaTotal.txt','w')
-paramsFile.write(str(surfaceAreaTotal))
-paramsFile.close()
+# Node sets and scalars in one binary file (model_meta.npz)
+write_meta(sets, scalars)
 #
 # Save .cae file for restart analysis
 mdb.saveAs(pathName="RECOIL")
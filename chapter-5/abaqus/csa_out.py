@@ -19,6 +19,9 @@ import sys
 import math
 import csv
 import numpy as np
+from odb_extract import region_values
+from radial import radial_stats
+from lumen import lumen_metrics
 #
 # ********************************************************************************
 # Output
@@ -29,25 +32,22 @@ odb = openOdb('RECOIL.odb',readOnly=True)
 step = odb.steps['RECOIL-2']
 odbSet = odb.rootAssembly.\
 instances['MULTILINK-STENT-1'].nodeSets['INNER NODES']
-coordSys = odb.rootAssembly.DatumCsysByThreePoints(name='REFCSYS',
-coordSysType=CYLINDRICAL, origin=(0,0,0),
-point1=(0.0, 0.0, -1.0), point2=(0.0, 1.0, 0.0) )
 #
-# Field output post-recoil
+# Cartesian COORD of the inner nodes post-recoil (the radius about the stent axis
+# is taken in radial_stats, so the field needs no cylindrical transform)
 lastFrame = step.frames[-1]
-displacement=lastFrame.fieldOutputs['COORD']
-cylindricalDisp = displacement.getTransformedField(datumCsys=coordSys)
-radialDisp = cylindricalDisp.getSubset(region=odbSet)
-radialValues = radialDisp.values
-# for v in radialValues:
- 	# print v.data[0]
-radialOutput = [v.data[0] for v in radialValues]
-recoilRadiusAve = sum(radialOutput)/len(radialOutput)
-# print 'recoilRadiusAve = ', recoilRadiusAve
+innerCoords = region_values(lastFrame.fieldOutputs['COORD'], odbSet)
+stats = radial_stats(innerCoords)
+recoilRadiusAve = float(stats['mean'])
 #
-CSA = fabs(math.pi * recoilRadiusAve ** 2)
+CSA = float(stats['csa'])
 print 'CROSS-SECTIONAL AREA = ', CSA
 #
+# Lumen area of axial slices (polygon through the innermost node of each sector)
+lumen = lumen_metrics(innerCoords)
+print 'MINIMUM LUMEN AREA = ', lumen['min_area'], ' AT X = ', lumen['min_position']
+print 'MEAN LUMEN AREA = ', lumen['mean_area']
+#
 # ********************************************************************************
 # Output
 # ********************************************************************************
@@ -0,0 +1,221 @@
+# ********************************************************************************
+#
+#		Geometric Feature Lookup
+#
+#		Spatial index (KD-tree, or a NumPy search where SciPy is not available)
+#		over the vertices, edge midpoints and faces of an imported stent part, so
+#		that datum points, planes, faces and node sets are found by position in
+#		place of SAT topology indices, which change between designs.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import os
+import numpy as np
+try:
+	from scipy.spatial import cKDTree
+except ImportError:
+	cKDTree = None
+#
+# ********************************************************************************
+# Point index
+# ********************************************************************************
+#
+# Nearest point queries on points (n, 3)
+class PointIndex(object):
+	def __init__(self, points):
+		self.points = np.asarray(points, dtype=float).reshape(-1, 3)
+		self.tree = cKDTree(self.points) if cKDTree is not None and len(self.points) else None
+	#
+	# Distance and index of the nearest point to each of x (m, 3)
+	def query(self, x):
+		x = np.asarray(x, dtype=float).reshape(-1, 3)
+		if self.tree is not None:
+			return self.tree.query(x)
+		d = np.sum((x[:,None,:] - self.points[None,:,:])**2, axis=2)
+		idx = np.argmin(d, axis=1)
+		return np.sqrt(d[np.arange(len(x)), idx]), idx
+#
+# ********************************************************************************
+# Part features
+# ********************************************************************************
+#
+# Cylindrical (r, theta, z) coordinates of Cartesian x (n, 3) about the z axis
+# of the part (the stent axis before assembly)
+def cylindrical(x):
+	x = np.asarray(x, dtype=float).reshape(-1, 3)
+	return np.column_stack((np.hypot(x[:,0], x[:,1]), np.arctan2(x[:,1], x[:,0]), x[:,2]))
+#
+def cartesian(c):
+	return np.column_stack((c[:,0] * np.cos(c[:,1]), c[:,0] * np.sin(c[:,1]), c[:,2]))
+#
+# Vertices, edge (chord) midpoints and points on faces of a stent part, with
+# its inner and outer radius and half length taken from the vertices, and the
+# edge chords (end vertex to end vertex) and face vertices where given
+class FeatureIndex(object):
+	def __init__(self, vertices, edges, faces, chords=None, face_vertices=None):
+		self.points = {'vertex':np.asarray(vertices, dtype=float).reshape(-1, 3),
+		'edge':np.asarray(edges, dtype=float).reshape(-1, 3),
+		'face':np.asarray(faces, dtype=float).reshape(-1, 3)}
+		self.trees = dict((kind, PointIndex(x)) for kind, x in self.points.items())
+		c = cylindrical(self.points['vertex'])
+		self.r_in = c[:,0].min()
+		self.r_out = c[:,0].max()
+		self.z_max = np.fabs(c[:,2]).max()
+		self.chords = None if chords is None else np.asarray(chords, dtype=float).reshape(-1, 3)
+		self.face_vertices = face_vertices
+	#
+	# Positions (r through the wall from 0 to 1, theta, z over the half length)
+	# that carry over between designs of different strut thickness and length
+	def normalise(self, x):
+		c = cylindrical(x)
+		return np.column_stack(((c[:,0] - self.r_in) / (self.r_out - self.r_in), c[:,1], c[:,2] / self.z_max))
+	#
+	def denormalise(self, n):
+		n = np.asarray(n, dtype=float).reshape(-1, 3)
+		return cartesian(np.column_stack((self.r_in + n[:,0] * (self.r_out - self.r_in), n[:,1], n[:,2] * self.z_max)))
+	#
+	# Indices of the nearest entities to points x (m, 3), raising ValueError where
+	# one is further than tol (default a quarter of the wall thickness)
+	def nearest(self, kind, x, tol=None, name=''):
+		if tol is None:
+			tol = 0.25 * (self.r_out - self.r_in)
+		d, idx = self.trees[kind].query(x)
+		if np.any(d > tol):
+			raise ValueError('no {0} within {1:.4g} of feature {2} (nearest {3:.4g})'.format(kind,
+			tol, name, np.max(d)))
+		return [int(k) for k in idx]
+	#
+	# Indices of the entities whose points (n, 3) satisfy predicate
+	def where(self, kind, predicate):
+		return [int(k) for k in np.flatnonzero(predicate(self.points[kind]))]
+	#
+	# Index of the first face on the inner (or outer) radius over its whole
+	# extent: its point and all its vertices within tol of the radius (a side
+	# face with a point on the inner or outer edge has vertices on both)
+	def radial_face(self, outer=False, tol=None):
+		if tol is None:
+			tol = 1e-3 * (self.r_out - self.r_in)
+		r = self.r_out if outer else self.r_in
+		vertex_r = cylindrical(self.points['vertex'])[:,0]
+		face_r = cylindrical(self.points['face'])[:,0]
+		for k, vertices in enumerate(self.face_vertices):
+			if abs(face_r[k] - r) < tol and np.all(np.fabs(vertex_r[list(vertices)] - r) < tol):
+				return k
+		raise ValueError('no face on the {0} radius {1:.4g}'.format('outer' if outer else 'inner', r))
+	#
+	# Indices of the vertices on the plane z at radius r (within tol) nearest each
+	# of angles, or None where there are fewer than one per angle
+	def vertices_at(self, z, r, angles, tol=None):
+		if tol is None:
+			tol = 1e-3 * (self.r_out - self.r_in)
+		c = cylindrical(self.points['vertex'])
+		on = np.flatnonzero((np.fabs(c[:,2] - z) < tol) & (np.fabs(c[:,0] - r) < tol))
+		if len(on) == 0:
+			return None
+		idx = on[np.argmin(np.fabs(np.angle(np.exp(1j * (c[on,1][:,None] - angles)))), axis=0)]
+		if len(set(idx)) < len(angles):
+			return None
+		return [int(k) for k in idx]
+	#
+	# Index of the longest edge of those most closely aligned with axis, running
+	# along it (first to last vertex), so parts oriented by it face the same way
+	# on every design
+	def aligned_edge(self, axis=(0.0, 0.0, 1.0)):
+		length = np.sqrt(np.sum(self.chords**2, axis=1))
+		cos = np.dot(self.chords, axis) / np.maximum(length, 1e-12)
+		return int(np.lexsort((-length, -np.round(cos, 6)))[0])
+	#
+	# Normalised positions of entities given by index (baseline topology)
+	def record(self, kind, indices):
+		return self.normalise(self.points[kind][list(indices)])
+	#
+	# Entities at recorded normalised positions in this part
+	def resolve(self, kind, positions, tol=None, name=''):
+		return self.nearest(kind, self.denormalise(positions), tol, name)
+#
+# Feature index of an Abaqus part
+def part_index(p):
+	vertices = np.array([v.pointOn[0] for v in p.vertices])
+	ends = [list(e.getVertices()) for e in p.edges]
+	edges = np.array([np.mean(vertices[k], axis=0) for k in ends])
+	chords = np.array([vertices[k[-1]] - vertices[k[0]] for k in ends])
+	faces = np.array([f.pointOn[0] for f in p.faces])
+	return FeatureIndex(vertices, edges, faces, chords, [list(f.getVertices()) for f in p.faces])
+#
+# ********************************************************************************
+# Recorded features
+# ********************************************************************************
+#
+# Reference file of the baseline features, kept with the scripts (and so copied
+# into every design directory with them)
+features_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stent_features.npz')
+#
+# Reference file recorded with csa_in.py -- record folder, written to the shared
+# scripts folder given rather than to the copy of the scripts being run
+def record_path(argv):
+	k = argv.index('record')
+	if k + 1 >= len(argv):
+		raise ValueError('give the scripts folder to record the features in (csa_in.py -- record folder)')
+	return os.path.join(argv[k + 1], os.path.basename(features_file))
+#
+# Baseline design parameters (w, t, l in m) the reference file is recorded from
+baseline = {'w':0.00015, 't':0.00015, 'l':0.00100}
+#
+# Features are {name: (kind, indices)} or {name: (kind, indices, rule)} in the
+# baseline topology. A feature is found by its rule (a function of the index
+# returning the indices, or None where it finds none), then by its normalised
+# position in reference (from an npz file, keys kind|name), and otherwise by its
+# baseline indices, which hold for designs with the baseline topology. With
+# record (baseline design only) the positions of the baseline indices are
+# recorded in reference for saving.
+def lookup(index, features, reference, tol=None, record=False):
+	found = {}
+	for name, feature in features.items():
+		kind, indices = feature[:2]
+		key = kind + '|' + name
+		if record:
+			reference[key] = index.record(kind, indices)
+		if len(feature) > 2:
+			found[name] = feature[2](index)
+			if found[name] is not None:
+				continue
+		if record:
+			found[name] = list(indices)
+		elif key in reference:
+			found[name] = index.resolve(kind, reference[key], tol, name)
+		elif max(indices) < len(index.points[kind]):
+			found[name] = list(indices)
+		else:
+			raise ValueError('{0} is not found by rule, in the feature reference file {1} or by '
+			'its baseline indices'.format(name, features_file))
+	return found
+#
+def load_features(path=features_file):
+	try:
+		npz = np.load(path)
+	except IOError:
+		return {}
+	reference = dict((key, npz[key]) for key in npz.files)
+	npz.close()
+	return reference
+#
+def save_features(reference, path=features_file):
+	featuresFile = open(path, 'wb')
+	np.savez(featuresFile, **reference)
+	featuresFile.close()
+#
+# Raises ValueError unless the geometry_params_{w,t,l}.txt files in folder hold
+# the baseline design
+def check_baseline(folder='.'):
+	for name, value in sorted(baseline.items()):
+		paramsFile = open(os.path.join(folder, 'geometry_params_{0}.txt'.format(name)), 'r')
+		design = float(paramsFile.read())
+		paramsFile.close()
+		if abs(design - value) > 1e-9 * value:
+			raise ValueError('features are recorded from the baseline design only ({0} = {1}, '
+			'baseline {2})'.format(name, design, value))
+#
+# ********************************************************************************
@@ -0,0 +1,310 @@
+# ********************************************************************************
+#
+#		Abaqus Results File (.fil) Reader
+#
+#		Reads ASCII results files (*FILE FORMAT=ASCII) into NumPy arrays cached as
+#		.npy files (memory-mapped on reload) and calculates the CSA, FS, RCP and SAR
+#		of parametric stent geometries in a process pool, without odbAccess.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import os
+import re
+import math
+import multiprocessing
+import numpy as np
+from radial import radii, radial_stats
+#
+# ********************************************************************************
+# Records
+# ********************************************************************************
+#
+# Record keys: node definition, node set and continuation, label cross-reference,
+# increment start and nodal output (U, RF, COORD)
+NODE = 1901
+NSET = 1931
+NSET_CONT = 1932
+LABEL = 1940
+INCREMENT = 2000
+nodal_outputs = {101:'U', 104:'RF', 107:'COORD'}
+#
+# Words of a record: integers I{width:2}{digits}, floats D{sign}{d.ddd}D{exp}
+# and 8 character strings A{text}
+word = re.compile(r'I( \d|\d\d)(\d+)|[DE]([ +-]?\d\.\d+[DE][+-]\d+)|A(.{8})', re.S)
+#
+def parse_record(text):
+	values = []
+	for m in word.finditer(text):
+		if m.group(2) is not None:
+			values.append(int(m.group(2)))
+		elif m.group(3) is not None:
+			values.append(float(m.group(3).replace('D', 'E')))
+		else:
+			values.append(m.group(4))
+	return values
+#
+# Records (key, attributes) of an ASCII results file, whose records are written
+# one after another on 80 character lines
+def read_records(path):
+	with open(path, 'r') as filFile:
+		text = ''.join(line.rstrip('\r\n') for line in filFile)
+	for record in text.split('*')[1:]:
+		values = parse_record(record)
+		if len(values) >= 2:
+			yield values[1], values[2:]
+#
+# ********************************************************************************
+# Results
+# ********************************************************************************
+#
+# Model and nodal output history of a results file:
+#   nodes (n,), coords (n, 3)                  node labels and coordinates
+#   sets {name: labels}                        node sets
+#   increments (m, 4)                          step, increment, total and step time
+#   {U, RF, COORD}_labels (k,), {...} (m, k, 3)   nodal output of each increment
+def parse_fil(path):
+	nodes = []
+	coords = []
+	sets = {}
+	labels = {}
+	increments = []
+	outputs = dict((name, []) for name in nodal_outputs.values())
+	current_set = None
+	for key, a in read_records(path):
+		if key == NODE:
+			nodes.append(a[0])
+			coords.append((list(a[1:4]) + [0.0, 0.0])[:3])
+		elif key == NSET:
+			current_set = str(a[0]).strip()
+			sets[current_set] = [v for v in a[1:] if isinstance(v, int)]
+		elif key == NSET_CONT and current_set is not None:
+			sets[current_set].extend(v for v in a if isinstance(v, int))
+		elif key == LABEL:
+			labels[str(a[0])] = ''.join(a[1:]).strip()
+		elif key == INCREMENT:
+			increments.append((a[5], a[6], a[0], a[1]))
+			for name in outputs:
+				outputs[name].append([])
+		elif key in nodal_outputs and increments:
+			outputs[nodal_outputs[key]][-1].append(a[:4])
+	#
+	result = {'nodes':np.array(nodes, dtype=np.int32),
+	'coords':np.array(coords, dtype=float).reshape(-1, 3),
+	'increments':np.array(increments, dtype=float).reshape(-1, 4)}
+	for name, history in outputs.items():
+		history = [rows for rows in history if rows]
+		if not history:
+			continue
+		result[name + '_labels'] = np.array([row[0] for row in history[0]], dtype=np.int32)
+		result[name] = np.array([[row[1:4] for row in rows] for rows in history], dtype=float)
+	# Long set names are written as references to label records
+	result['sets'] = dict((labels.get(name, name), np.array(v, dtype=np.int32)) for name, v in sets.items())
+	return result
+#
+# Results of a file, cached as .npy files in {path}.npy/ and memory-mapped when
+# the cache is newer than the file
+def load_fil(path, mmap_mode='r'):
+	folder = path + '.npy'
+	stamp = os.path.join(folder, 'increments.npy')
+	if not os.path.exists(stamp) or os.path.getmtime(stamp) < os.path.getmtime(path):
+		result = parse_fil(path)
+		if not os.path.exists(folder):
+			os.makedirs(folder)
+		for name, value in result.items():
+			if name == 'sets':
+				np.savez(os.path.join(folder, 'sets.npz'), **value)
+			elif name != 'increments':
+				np.save(os.path.join(folder, name + '.npy'), value)
+		np.save(stamp, result['increments'])
+	result = {}
+	for name in os.listdir(folder):
+		if name.endswith('.npy'):
+			result[name[:-4]] = np.load(os.path.join(folder, name), mmap_mode=mmap_mode)
+	sets = np.load(os.path.join(folder, 'sets.npz'))
+	result['sets'] = dict((name, sets[name]) for name in sets.files)
+	return result
+#
+# Nodal output (increments, nodes, 3) of the given labels
+def nodal(result, name, labels):
+	own = result[name + '_labels']
+	order = np.argsort(own)
+	return result[name][:, order[np.searchsorted(own, labels, sorter=order)]]
+#
+# Original coordinates (n, 3) of the given labels (node definition records)
+def node_coords(result, labels):
+	order = np.argsort(result['nodes'])
+	return result['coords'][order[np.searchsorted(result['nodes'], labels, sorter=order)]]
+#
+# Increments (indices) of a step
+def step_increments(result, step):
+	return np.flatnonzero(result['increments'][:,0] == step)
+#
+# ********************************************************************************
+# Metrics
+# ********************************************************************************
+#
+# CSA post-recoil and FS of a RECOIL results file (last step). The initial
+# length is taken from the node definitions, as increment 0 is not written.
+def recoil_metrics(result, inner, left, right):
+	last = step_increments(result, result['increments'][-1,0])[-1]
+	stats = radial_stats(nodal(result, 'COORD', inner)[last])
+	recoilRadiusAve = float(stats['mean'])
+	x0 = node_coords(result, np.concatenate((left, right)))[:,0]
+	x = nodal(result, 'COORD', np.concatenate((left, right)))[last,:,0]
+	initialLength = np.mean(x0[:len(left)]) - np.mean(x0[len(left):])
+	finalLength = np.mean(x[:len(left)]) - np.mean(x[len(left):])
+	return {'recoil_radius':recoilRadiusAve, 'min_radius':float(stats['min']), 'csa':float(stats['csa']),
+	'length':finalLength, 'fs':math.fabs((finalLength - initialLength) / initialLength * 100.0)}
+#
+# RCP of a STIFFNESS results file (last step): radial tool forces at the tool
+# reference points summed per increment and interpolated at the target crimp (%).
+# The crimp is relative to the node definitions (the imported, recoiled state).
+def crimp_metrics(result, inner, tools, surfaceAreaOuter, target=10.0):
+	incs = step_increments(result, result['increments'][-1,0])
+	initial = float(np.mean(radii(node_coords(result, inner))))
+	CRIMP = radial_stats(nodal(result, 'COORD', inner)[incs], initial)['crimp']
+	x = node_coords(result, tools)
+	er = x * [0.0, 1.0, 1.0] / radii(x)[:,None]
+	RFSUM = np.sum(np.fabs(np.sum(nodal(result, 'RF', tools)[incs] * er, axis=2)), axis=1)
+	return {'crimp':CRIMP, 'rfsum':RFSUM,
+	'rcp':(np.interp(target, CRIMP, RFSUM) / surfaceAreaOuter * 10**6) / 8}
+#
+# Stent-to-artery ratio (%) of the crimped stent (outer radius 0.9, length 5)
+def sar(surfaceAreaOuter, outer_rad=0.9, stent_length=5.0):
+	return surfaceAreaOuter / (2 * math.pi * outer_rad * stent_length) * 100
+#
+# ********************************************************************************
+# Campaign post-processing
+# ********************************************************************************
+#
+# Metrics of one design: job is a dict of the RECOIL and STIFFNESS results files,
+# node labels (inner, left, right, tools) and surfaceAreaOuter
+def evaluate(job):
+	out = {'recoil':job['recoil']}
+	try:
+		recoil = recoil_metrics(load_fil(job['recoil']), job['inner'], job['left'], job['right'])
+		crimp = crimp_metrics(load_fil(job['stiffness']), job['inner'], job['tools'],
+		job['surfaceAreaOuter'])
+		out.update({'csa':recoil['csa'], 'fs':recoil['fs'], 'rcp':crimp['rcp'],
+		'sar':sar(job['surfaceAreaOuter']), 'status':'done'})
+	except Exception as e:
+		out.update({'status':'failed', 'error':str(e)})
+	return out
+#
+# Metrics of many designs on a process pool
+def evaluate_all(jobs, processes=None):
+	pool = multiprocessing.Pool(processes)
+	try:
+		return pool.map(evaluate, jobs, chunksize=max(1, len(jobs) // (4 * (processes or multiprocessing.cpu_count()))))
+	finally:
+		pool.close()
+		pool.join()
+#
+# ********************************************************************************
+# Synthetic results files
+# ********************************************************************************
+#
+def format_word(v):
+	if isinstance(v, str):
+		return 'A' + v.ljust(8)[:8]
+	if isinstance(v, (int, np.integer)):
+		return 'I{0:2d}{1}'.format(len(str(int(v))), int(v))
+	return 'D' + '{0: .15E}'.format(float(v)).replace('E', 'D')
+#
+def format_record(key, attributes):
+	return '*' + ''.join(format_word(v) for v in [len(attributes) + 2, key] + list(attributes))
+#
+# Writes an ASCII results file of node definitions (labels, coords), node sets
+# and nodal output; increments is a list of (step, increment, total time,
+# step time, {output name: (labels, values (k, 3))})
+def write_fil(path, labels, coords, sets, increments):
+	records = [format_record(NODE, [int(n)] + list(x)) for n, x in zip(labels, coords)]
+	keys = dict((name, key) for key, name in nodal_outputs.items())
+	for name, members in sorted(sets.items()):
+		records.append(format_record(NSET, [name] + [int(n) for n in members]))
+	for step, inc, total, step_time, outputs in increments:
+		records.append(format_record(INCREMENT, [float(total), float(step_time), 0.0, 0.0, 1,
+		int(step), int(inc), 0, 1.0, 0.0, 0.0]))
+		for name, (out_labels, values) in sorted(outputs.items()):
+			records.extend(format_record(keys[name], [int(n)] + list(v)) for n, v in zip(out_labels, values))
+	text = ''.join(records)
+	with open(path, 'w') as filFile:
+		for i in range(0, len(text), 80):
+			filFile.write(text[i:i+80] + '\n')
+#
+# Synthetic RECOIL and STIFFNESS results files (as the odb_mock databases, with
+# tool reference points labelled from 100001) and the node labels of a job. As
+# in an analysis, increment 0 is not written, and the STIFFNESS node definitions
+# are the imported (recoiled) coordinates. The expected metrics are csa
+# pi * 1.05^2, fs 3.0, rcp 1e5 and sar 100 / (0.9 pi).
+def build_synthetic(folder, frames=20, **kwargs):
+	from odb_mock import stent_nodes, deform
+	labels, coords, inner, left, right = stent_nodes(**kwargs)
+	f = np.linspace(0.0, 1.0, frames + 1)[1:]
+	recoil = [(1, k + 1, s, s, {'COORD':(labels, deform(coords, 1.0 + 0.6 * s))}) for k, s in enumerate(f)]
+	start = deform(coords, 1.5, 0.97)
+	recoil += [(2, k + 1, 1 + s, s, {'COORD':(labels, deform(coords, 1.6 - 0.1 * s, 1.0 - 0.03 * s))})
+	for k, s in enumerate(f)]
+	tools = np.arange(100001, 100009, dtype=np.int32)
+	angles = np.arange(8) * np.pi / 4
+	tool_coords = np.column_stack((np.full(8, 2.5), 2.0 * np.cos(angles), 2.0 * np.sin(angles)))
+	er = tool_coords * [0.0, 0.5, 0.5]
+	crimp = [(3, k + 1, 2 + s, s, {'COORD':(labels, deform(start, 1.0 - 0.2 * s)), 'RF':(tools, 2.0 * s * er)})
+	for k, s in enumerate(f)]
+	all_labels = np.concatenate((labels, tools))
+	sets = {'INNER':inner, 'ENDL':left, 'ENDR':right, 'TOOLS':tools}
+	recoil_path = os.path.join(folder, 'RECOIL.fil')
+	stiffness_path = os.path.join(folder, 'STIFFNESS.fil')
+	write_fil(recoil_path, all_labels, np.vstack((coords, tool_coords)), sets, recoil)
+	write_fil(stiffness_path, all_labels, np.vstack((start, tool_coords)), sets, crimp)
+	return {'recoil':recoil_path, 'stiffness':stiffness_path, 'inner':inner, 'left':left,
+	'right':right, 'tools':tools, 'surfaceAreaOuter':10.0}
+#
+# Check of the reader and metrics on synthetic files
+if __name__ == '__main__':
+	import time
+	import shutil
+	import tempfile
+	from odb_mock import stent_nodes, deform
+	folder = tempfile.mkdtemp()
+	try:
+		mesh = {'n_axial':20, 'n_circ':24}
+		job = build_synthetic(folder, frames=20, **mesh)
+		labels, coords, inner, left, right = stent_nodes(**mesh)
+		start = time.time()
+		result = parse_fil(job['recoil'])
+		print('parsed {0} nodes, {1} increments in {2:.2f} s'.format(len(result['nodes']),
+		len(result['increments']), time.time() - start))
+		#
+		# Records
+		assert np.array_equal(result['nodes'][:len(labels)], labels)
+		assert np.allclose(result['coords'][:len(labels)], coords)
+		assert np.array_equal(result['sets']['INNER'], inner)
+		assert np.array_equal(result['sets']['TOOLS'], job['tools'])
+		assert result['increments'].shape == (40, 4)
+		assert np.array_equal(result['increments'][:,0], np.repeat([1.0, 2.0], 20))
+		assert np.allclose(result['increments'][-1,2:], (2.0, 1.0))
+		assert result['COORD'].shape == (40, len(labels), 3)
+		assert np.allclose(result['COORD'][19], deform(coords, 1.6))
+		assert np.allclose(nodal(result, 'COORD', inner[::-1])[-1], deform(coords, 1.5, 0.97)[inner[::-1] - 1])
+		stiffness = parse_fil(job['stiffness'])
+		assert np.allclose(nodal(stiffness, 'RF', job['tools'])[9,:,1:],
+		np.column_stack((np.cos(np.arange(8) * np.pi / 4), np.sin(np.arange(8) * np.pi / 4))))
+		#
+		# Metrics against their analytic values
+		metrics = evaluate(job)
+		assert metrics['status'] == 'done', metrics
+		assert abs(metrics['csa'] - math.pi * 1.05 ** 2) < 1e-9
+		assert abs(metrics['fs'] - 3.0) < 1e-9
+		assert abs(metrics['rcp'] - 1e5) < 1e-6
+		assert abs(metrics['sar'] - 100.0 / (0.9 * math.pi)) < 1e-9
+		start = time.time()
+		assert evaluate_all([job] * 8, processes=2) == [metrics] * 8
+		print('8 designs from the .npy cache in {0:.3f} s'.format(time.time() - start))
+		print(metrics)
+	finally:
+		shutil.rmtree(folder)
+# ********************************************************************************
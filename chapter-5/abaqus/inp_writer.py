@@ -0,0 +1,309 @@
+# ********************************************************************************
+#
+#		Abaqus Input File Writer
+#
+#		Writes the RECOIL (balloon inflation and recoil) and STIFFNESS (radial
+#		crimping) input files of csa_in.py and rcp_in.py directly from a stent
+#		mesh (node and element arrays), streaming the keywords to disk without
+#		the Abaqus CAE kernel.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import os
+import sys
+import math
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'material'))
+from plla_lib import plla_constants
+#
+# ********************************************************************************
+# Inputs
+# ********************************************************************************
+#
+# Instances (as read by the post-processing scripts)
+stentName = 'MULTILINK-STENT-1'
+balloonName = 'BALLOON-1'
+toolNames = ['CRIMP TOOL-1'] + ['CRIMP TOOL-1-rad-{0}'.format(k) for k in range(2, 9)]
+#
+# Balloon (length, diameter, mesh size, PET shell thickness, radial displacement)
+blen = 7.0
+bdia = 1.4
+bsize = 0.1
+bthickness = 0.02
+binflate = 1.05
+#
+# Crimp tools (plate length and width, mesh size, radius of the reference points)
+tlen = 8.0
+twidth = 2.0
+tsize = 0.2
+tradius = 2.0
+#
+# Steps
+time_period = 1
+output_variables = {'node':'CF, COORD, RF, U', 'element':'LE, PE, PEEQ, PEMAG, S',
+'contact':'CDISP, CSTRESS'}
+#
+# ********************************************************************************
+# Keywords
+# ********************************************************************************
+#
+# Names with spaces are quoted
+def q(name):
+	return '"{0}"'.format(name) if ' ' in name else name
+#
+# Rows of an array written with fmt (one row per line), in chunks
+def write_rows(f, fmt, rows, chunk=20000):
+	rows = np.asarray(rows)
+	for i in range(0, len(rows), chunk):
+		f.write(''.join(fmt % tuple(row) for row in rows[i:i+chunk].tolist()))
+#
+# Labels, 16 per line
+def write_labels(f, labels):
+	labels = np.asarray(labels, dtype=int).ravel()
+	full = len(labels) // 16 * 16
+	write_rows(f, ', '.join(['%d'] * 16) + '\n', labels[:full].reshape(-1, 16))
+	if len(labels) > full:
+		f.write(', '.join(str(v) for v in labels[full:].tolist()) + '\n')
+#
+def write_nodes(f, labels, coords):
+	f.write('*Node\n')
+	write_rows(f, '%d, %.9g, %.9g, %.9g\n', np.column_stack((labels, coords)))
+#
+def write_elements(f, kind, elset, labels, connectivity):
+	f.write('*Element, type={0}, elset={1}\n'.format(kind, q(elset)))
+	connectivity = np.asarray(connectivity, dtype=int)
+	write_rows(f, ', '.join(['%d'] * (connectivity.shape[1] + 1)) + '\n',
+	np.column_stack((labels, connectivity)))
+#
+def write_nset(f, name, labels, instance=None):
+	f.write('*Nset, nset={0}{1}\n'.format(q(name), '' if instance is None else ', instance=' + q(instance)))
+	write_labels(f, labels)
+#
+def write_elset(f, name, labels, instance=None):
+	f.write('*Elset, elset={0}{1}\n'.format(q(name), '' if instance is None else ', instance=' + q(instance)))
+	write_labels(f, labels)
+#
+# Element based surface from elements and their faces (1..6), with one internal
+# element set per face
+def write_surface(f, name, elements, faces, instance=None):
+	elements = np.asarray(elements, dtype=int)
+	faces = np.asarray(faces, dtype=int)
+	prefix = '_' + name.replace(' ', '_')
+	for face in np.unique(faces):
+		write_elset(f, '{0}_S{1}'.format(prefix, face), elements[faces == face], instance)
+	f.write('*Surface, type=ELEMENT, name={0}\n'.format(q(name)))
+	for face in np.unique(faces):
+		f.write('{0}_S{1}, S{1}\n'.format(prefix, face))
+#
+# Cylindrical transform of a node set about the axis through a and b
+def write_transform(f, nset, a, b):
+	f.write('*Transform, nset={0}, type=C\n'.format(q(nset)))
+	f.write(', '.join('%.9g' % v for v in list(a) + list(b)) + '\n')
+#
+# Boundary condition rows (nset, first dof, last dof, value)
+def write_boundary(f, rows, amplitude=None):
+	f.write('*Boundary{0}\n'.format('' if amplitude is None else ', amplitude=' + amplitude))
+	for nset, first, last, value in rows:
+		f.write('{0}, {1}, {2}, {3:.9g}\n'.format(q(nset), first, last, value))
+#
+def write_amplitude(f, name, data):
+	f.write('*Amplitude, name={0}, time=TOTAL TIME, definition=SMOOTH STEP\n'.format(name))
+	f.write(', '.join('%.9g' % v for point in data for v in point) + '\n')
+#
+def write_step(f, name):
+	f.write('*Step, name={0}, nlgeom=YES, inc=10000\n*Static\n'.format(name))
+	f.write('0.1, {0:.9g}, 1e-05, 1.\n'.format(time_period))
+#
+# Field, history and (where fil) ASCII results file output of a step
+def write_output(f, restart, fil=False):
+	f.write(restart + '\n')
+	f.write('*Output, field, time interval=0.1, time marks=YES\n')
+	f.write('*Node Output\n{0}\n'.format(output_variables['node']))
+	f.write('*Element Output, directions=YES\n{0}\n'.format(output_variables['element']))
+	f.write('*Contact Output\n{0}\n'.format(output_variables['contact']))
+	f.write('*Output, history, variable=PRESELECT, time interval=0.1, time marks=YES\n')
+	if fil:
+		f.write('*Node File\nCOORD, RF\n')
+	f.write('*End Step\n')
+#
+# ********************************************************************************
+# Meshes
+# ********************************************************************************
+#
+# Balloon: cylinder of S4R elements about the x axis centred at x0 (normals
+# outward)
+def balloon_mesh(x0, length=blen, radius=bdia / 2, size=bsize):
+	n_axial = int(math.ceil(length / size)) + 1
+	n_circ = int(math.ceil(2 * math.pi * radius / size))
+	s = np.linspace(-length / 2, length / 2, n_axial)
+	t = np.arange(n_circ) * 2 * math.pi / n_circ
+	S, T = np.meshgrid(s, t, indexing='ij')
+	coords = np.column_stack((x0 + S.ravel(), radius * np.cos(T.ravel()), radius * np.sin(T.ravel())))
+	i, j = np.meshgrid(np.arange(n_axial - 1), np.arange(n_circ), indexing='ij')
+	i, j = i.ravel(), j.ravel()
+	jn = (j + 1) % n_circ
+	connectivity = np.column_stack((i * n_circ + j, i * n_circ + jn, (i + 1) * n_circ + jn, (i + 1) * n_circ + j)) + 1
+	labels = np.arange(1, len(coords) + 1)
+	ends = [labels[:n_circ], labels[-n_circ:]]
+	return {'nodes':labels, 'coords':coords, 'elements':np.arange(1, len(connectivity) + 1),
+	'connectivity':connectivity, 'nsets':{'ALL NODES':labels, 'END NODES 1':ends[0], 'END NODES 2':ends[1]}}
+#
+# Crimp tool: plate of R3D4 elements in the local x-y plane (x along the stent
+# axis, normal +z) with its reference point at the origin
+def tool_mesh(length=tlen, width=twidth, size=tsize):
+	nx = int(round(length / size)) + 1
+	ny = int(round(width / size)) + 1
+	X, Y = np.meshgrid(np.linspace(-length / 2, length / 2, nx), np.linspace(-width / 2, width / 2, ny), indexing='ij')
+	coords = np.column_stack((X.ravel(), Y.ravel(), np.zeros(nx * ny)))
+	i, j = np.meshgrid(np.arange(nx - 1), np.arange(ny - 1), indexing='ij')
+	i, j = i.ravel(), j.ravel()
+	connectivity = np.column_stack((i * ny + j, (i + 1) * ny + j, (i + 1) * ny + j + 1, i * ny + j + 1)) + 1
+	rp = nx * ny + 1
+	return {'nodes':np.arange(1, rp + 1), 'coords':np.vstack((coords, [0.0, 0.0, 0.0])),
+	'elements':np.arange(1, len(connectivity) + 1), 'connectivity':connectivity, 'rp':rp}
+#
+# ********************************************************************************
+# Model data
+# ********************************************************************************
+#
+def write_heading(f, job):
+	f.write('*Heading\n** Job name: {0} Model name: Model-1\n'.format(job))
+	f.write('*Preprint, echo=NO, model=NO, history=NO, contact=NO\n')
+#
+# PLLA (plla_lib constants of aspect ratio ar) and PET
+def write_materials(f, ar):
+	constants = plla_constants(ar)
+	D = constants['elastic'][0]
+	f.write('*Material, name=PLLA\n*Density\n1.2e-09,\n*Elastic, type=ORTHOTROPIC\n')
+	f.write(', '.join('%.9g' % v for v in D[:8]) + '\n%.9g,\n' % D[8])
+	f.write('*Plastic\n')
+	write_rows(f, '%.9g, %.9g\n', constants['plastic'][0])
+	f.write('*Potential\n' + ', '.join('%.9g' % v for v in constants['potential'][0]) + '\n')
+	f.write('*Material, name=PET\n*Density\n1.38e-09,\n*Elastic\n2500., 0.4\n')
+#
+# Stent part: mesh dict of nodes, coords, elements, connectivity, element type,
+# nsets {name: labels} and surfaces {name: (elements, faces)}, with the stent
+# axis along x; PLLA oriented in the cylindrical system about the axis
+def write_stent_part(f, stent):
+	f.write('*Part, name=MULTILINK-STENT\n')
+	write_nodes(f, stent['nodes'], stent['coords'])
+	write_elements(f, stent.get('type', 'C3D8R'), 'BODY', stent['elements'], stent['connectivity'])
+	for name, labels in sorted(stent['nsets'].items()):
+		write_nset(f, name, labels)
+	for name, (elements, faces) in sorted(stent['surfaces'].items()):
+		write_surface(f, name, elements, faces)
+	f.write('*Orientation, name=CYLCSYS, system=CYLINDRICAL\n')
+	f.write('0., 0., 0., 1., 0., 0.\n3, 0.\n')
+	f.write('*Solid Section, elset=BODY, orientation=CYLCSYS, material=PLLA\n,\n*End Part\n')
+#
+def write_balloon_part(f, balloon):
+	f.write('*Part, name=BALLOON\n')
+	write_nodes(f, balloon['nodes'], balloon['coords'])
+	write_elements(f, 'S4R', 'BODY', balloon['elements'], balloon['connectivity'])
+	for name, labels in sorted(balloon['nsets'].items()):
+		write_nset(f, name, labels)
+	f.write('*Surface, type=ELEMENT, name=SURFACE\nBODY, SPOS\n')
+	f.write('*Shell Section, elset=BODY, material=PET\n{0:.9g}, 5\n*End Part\n'.format(bthickness))
+#
+def write_tool_part(f, tool):
+	f.write('*Part, name={0}\n'.format(q('CRIMP TOOL')))
+	write_nodes(f, tool['nodes'], tool['coords'])
+	write_elements(f, 'R3D4', 'BODY', tool['elements'], tool['connectivity'])
+	write_nset(f, 'RP', [tool['rp']])
+	f.write('*Rigid Body, ref node=RP, elset=BODY\n')
+	f.write('*Surface, type=ELEMENT, name=SURFACE\nBODY, SPOS\n*End Part\n')
+#
+def write_contact(f, name, slave, master):
+	f.write('** {0}\n*Contact Pair, interaction=GENERAL, small sliding, type=SURFACE TO SURFACE\n'.format(name))
+	f.write('{0}, {1}\n'.format(q(slave), q(master)))
+#
+# ********************************************************************************
+# Input files
+# ********************************************************************************
+#
+# Axial centre of the stent (the balloon coincident point)
+def stent_centre(stent):
+	return 0.5 * (np.min(stent['coords'][:,0]) + np.max(stent['coords'][:,0]))
+#
+# RECOIL.inp: balloon inflation (INFLATE) and deflation (RECOIL-2) of the stent
+# of aspect ratio ar. Where fil, COORD and RF are also written to the ASCII
+# results file (RECOIL.fil, for fil_reader.py).
+def write_recoil_inp(path, stent, ar, fil=False):
+	balloon = balloon_mesh(stent_centre(stent))
+	axis = ((0.0, 0.0, 0.0), (1.0, 0.0, 0.0))
+	with open(path, 'w') as f:
+		write_heading(f, os.path.splitext(os.path.basename(path))[0])
+		write_stent_part(f, stent)
+		write_balloon_part(f, balloon)
+		f.write('*Assembly, name=Assembly\n')
+		for name, part in ((stentName, 'MULTILINK-STENT'), (balloonName, 'BALLOON')):
+			f.write('*Instance, name={0}, part={1}\n*End Instance\n'.format(name, part))
+		write_nset(f, 'STENT BC', stent['nsets']['CENTRE NODES'], stentName)
+		write_nset(f, 'BALLOON', balloon['nodes'], balloonName)
+		write_transform(f, 'STENT BC', *axis)
+		write_transform(f, 'BALLOON', *axis)
+		f.write('*End Assembly\n')
+		write_amplitude(f, 'INFLATION', ((0.0, 0.0), (time_period, 1.0), (2 * time_period, 0.0)))
+		write_materials(f, ar)
+		f.write('*Surface Interaction, name=GENERAL\n1.,\n')
+		write_contact(f, 'INFLATE', stentName + '.INNER', balloonName + '.SURFACE')
+		if fil:
+			f.write('*File Format, ASCII\n')
+		#
+		write_step(f, 'INFLATE')
+		write_boundary(f, [('STENT BC', 2, 3, 0.0), ('BALLOON', 2, 3, 0.0)])
+		write_boundary(f, [('BALLOON', 1, 1, binflate)], amplitude='INFLATION')
+		write_output(f, '*Restart, write, frequency=0', fil)
+		write_step(f, 'RECOIL-2')
+		write_output(f, '*Restart, write, frequency=1, overlay', fil)
+#
+# STIFFNESS.inp: crimping (CRIMP-2) of the recoiled stent imported from the
+# RECOIL results by eight rigid plates, each displaced radially by 2.0 less 0.9
+# of the recoil radius
+def write_stiffness_inp(path, stent, recoilRadiusAve, fil=False, restart='RECOIL'):
+	tool = tool_mesh()
+	distance = tradius - recoilRadiusAve + 0.1 * recoilRadiusAve
+	with open(path, 'w') as f:
+		write_heading(f, os.path.splitext(os.path.basename(path))[0])
+		write_tool_part(f, tool)
+		f.write('*Assembly, name=Assembly\n')
+		f.write('*Instance, name={0}, library={1}, instance={0}\n'.format(stentName, restart))
+		f.write('*Import, state=YES, update=YES\n*End Instance\n')
+		#
+		# Plates start at (0, 0, -2) facing the axis and are patterned about it,
+		# each moving along its rotated local z axis
+		boundary = []
+		for n, name in enumerate(toolNames):
+			angle = 45.0 * n
+			f.write('*Instance, name={0}, part={1}\n'.format(q(name), q('CRIMP TOOL')))
+			f.write('0., 0., {0:.9g}\n'.format(-tradius))
+			f.write('0., 0., 0., 1., 0., 0., {0:.9g}\n'.format(angle))
+			f.write('*End Instance\n')
+			write_nset(f, 'TOOL-{0}-RP'.format(n + 1), [tool['rp']], name)
+			t = math.radians(angle)
+			d = np.round(distance * np.array([0.0, -math.sin(t), math.cos(t)]), 12) + 0.0
+			boundary += [('TOOL-{0}-RP'.format(n + 1), dof + 1, dof + 1, d[dof]) for dof in range(3)]
+			boundary += [('TOOL-{0}-RP'.format(n + 1), 4, 6, 0.0)]
+		#
+		write_nset(f, 'CENTRE NODES ASSY', stent['nsets']['CENTRE NODES'], stentName)
+		write_nset(f, 'INNER NODES ASSY', stent['nsets']['INNER NODES'], stentName)
+		write_transform(f, 'CENTRE NODES ASSY', (0.0, 0.0, 0.0), (1.0, 0.0, 0.0))
+		elements, faces = stent['surfaces']['OUTER']
+		write_surface(f, 'OUTER ASSY', elements, faces, stentName)
+		f.write('*End Assembly\n')
+		write_amplitude(f, 'CRIMPING', ((0.0, 0.0), (time_period, 1.0)))
+		f.write('*Surface Interaction, name=GENERAL\n1.,\n')
+		for n, name in enumerate(toolNames):
+			write_contact(f, 'CT-{0}-CONTACT'.format(n + 1), 'OUTER ASSY', name + '.SURFACE')
+		if fil:
+			f.write('*File Format, ASCII\n')
+		#
+		write_step(f, 'CRIMP-2')
+		write_boundary(f, [('CENTRE NODES ASSY', 2, 3, 0.0)])
+		write_boundary(f, boundary, amplitude='CRIMPING')
+		write_output(f, '*Restart, write, frequency=0', fil)
+#
+# ********************************************************************************
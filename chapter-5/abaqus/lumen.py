@@ -0,0 +1,121 @@
+# ********************************************************************************
+#
+#		Lumen Area of the Inner Nodes
+#
+#		Bins the inner nodes of a stent by axial position and angle (one sort of
+#		the bin keys, O(n log n)) and takes the polygon through the innermost node
+#		of each angular sector as the lumen of each axial slice, giving the lumen
+#		area along the stent in place of pi * mean(r)^2.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import math
+import numpy as np
+from radial import origin, axis, projection
+#
+# ********************************************************************************
+# Slices
+# ********************************************************************************
+#
+# In-plane basis (e1, e2) normal to the axis, e1 along the projection of the
+# global axis least aligned with it (y and z for the stent x axis)
+def plane_basis(axis=axis):
+	e = np.asarray(axis, dtype=float)
+	e = e / np.linalg.norm(e)
+	e1 = np.dot(projection(e), np.eye(3)[np.argmin(np.fabs(e))])
+	e1 /= np.linalg.norm(e1)
+	return e1, np.cross(e, e1)
+#
+# Lumen area of each of n_slices axial slices of Cartesian coords (n, 3): the
+# nodes are binned into n_sectors angular sectors per slice, and the polygon
+# through the innermost node of each occupied sector (in angular order) gives
+# the area (shoelace formula). Slices without nodes have NaN area.
+def lumen_slices(coords, n_slices=20, n_sectors=36, origin=origin, axis=axis):
+	x = np.asarray(coords, dtype=float) - origin
+	e = np.asarray(axis, dtype=float) / np.linalg.norm(axis)
+	e1, e2 = plane_basis(e)
+	s = np.dot(x, e)
+	y = np.dot(x, e1)
+	z = np.dot(x, e2)
+	r = np.hypot(y, z)
+	theta = np.arctan2(z, y)
+	#
+	# Slice and sector of each node
+	edges = np.linspace(s.min(), s.max(), n_slices + 1)
+	k = np.clip(np.searchsorted(edges, s, side='right') - 1, 0, n_slices - 1)
+	j = np.clip(((theta + math.pi) / (2 * math.pi) * n_sectors).astype(int), 0, n_sectors - 1)
+	key = k * n_sectors + j
+	#
+	# Sorted by bin then radius, the first node of each bin is its innermost
+	order = np.lexsort((r, key))
+	key = key[order]
+	first = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+	vertex = order[first]
+	slice_of = key[first] // n_sectors
+	#
+	# Next vertex of the same slice (the last wraps to the first)
+	last = np.r_[slice_of[1:] != slice_of[:-1], True]
+	start = np.flatnonzero(np.r_[True, last[:-1]])
+	nxt = np.arange(len(vertex)) + 1
+	nxt[last] = start
+	cross = y[vertex] * z[vertex][nxt] - z[vertex] * y[vertex][nxt]
+	count = np.bincount(slice_of, minlength=n_slices)
+	area = 0.5 * np.bincount(slice_of, weights=cross, minlength=n_slices)
+	area[count < 3] = np.nan
+	r_min = np.nan * np.ones(n_slices)
+	r_min[slice_of[start]] = np.minimum.reduceat(r[vertex], start)
+	return {'position':0.5 * (edges[1:] + edges[:-1]), 'area':area, 'min_radius':r_min,
+	'sectors':count}
+#
+# Minimum, mean, standard deviation and 5/50/95 percentiles of the slice lumen
+# areas, with the position of the minimum (all NaN when no slice has an area,
+# e.g. for a sparse node set)
+def lumen_metrics(coords, n_slices=20, n_sectors=36, origin=origin, axis=axis):
+	slices = lumen_slices(coords, n_slices, n_sectors, origin, axis)
+	valid = ~np.isnan(slices['area'])
+	if not np.any(valid):
+		return dict([(name, np.nan) for name in ('min_area', 'mean_area', 'std_area', 'p5_area',
+		'p50_area', 'p95_area', 'min_position', 'min_radius')] + [('slices', slices)])
+	area = slices['area'][valid]
+	k = np.flatnonzero(valid)[np.argmin(area)]
+	p5, p50, p95 = np.percentile(area, [5, 50, 95])
+	return {'min_area':area.min(), 'mean_area':area.mean(), 'std_area':area.std(),
+	'p5_area':p5, 'p50_area':p50, 'p95_area':p95, 'min_position':slices['position'][k],
+	'min_radius':np.nanmin(slices['min_radius']), 'slices':slices}
+#
+# ********************************************************************************
+# Check
+# ********************************************************************************
+#
+# Synthetic cylinder point cloud (n_axial x n_circ nodes of radius r) with the
+# radius reduced by depth over an axial band (prolapse)
+def cylinder_cloud(n_axial=250, n_circ=400, r=1.5, length=5.0, depth=0.2, band=(2.0, 2.5), seed=0):
+	rng = np.random.RandomState(seed)
+	x = rng.uniform(0.0, length, n_axial * n_circ)
+	t = rng.uniform(-math.pi, math.pi, n_axial * n_circ)
+	R = np.where((x >= band[0]) & (x < band[1]), r - depth, r)
+	return np.column_stack((x, R * np.cos(t), R * np.sin(t)))
+#
+# Check on the cylinder of radius 1.5 with a 0.2 deep prolapse over 2.0 < x < 2.5
+if __name__ == '__main__':
+	import time
+	coords = cylinder_cloud()
+	start = time.time()
+	metrics = lumen_metrics(coords, n_slices=50, n_sectors=72)
+	print('{0} nodes in {1:.3f} s'.format(len(coords), time.time() - start))
+	print('min area {0:.4f} at x = {1:.2f}, mean area {2:.4f}, median {3:.4f}'.format(metrics['min_area'],
+	metrics['min_position'], metrics['mean_area'], metrics['p50_area']))
+	assert abs(metrics['min_area'] - math.pi * 1.3**2) < 0.01 * math.pi * 1.3**2
+	assert 2.0 <= metrics['min_position'] <= 2.5
+	assert abs(metrics['min_radius'] - 1.3) < 1e-9
+	assert abs(metrics['p50_area'] - math.pi * 1.5**2) < 0.01 * math.pi * 1.5**2
+	assert abs(metrics['mean_area'] - math.pi * 1.5**2) < 0.03 * math.pi * 1.5**2
+	#
+	# Slices of fewer than three sectors have no area
+	sparse = lumen_metrics(cylinder_cloud(n_axial=1, n_circ=2), n_slices=50)
+	assert np.isnan(sparse['min_area']) and np.isnan(sparse['min_position'])
+	assert np.all(np.isnan(sparse['slices']['area']))
+# ********************************************************************************
@@ -0,0 +1,85 @@
+# ********************************************************************************
+#
+#		Model Metadata
+#
+#		Node sets (int32 labels) and scalars (reference points, face and edge
+#		labels, surface areas) of a stent model, written once by csa_in.py to a
+#		binary model_meta.npz file and loaded by the crimp and output scripts.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import struct
+import zipfile
+import numpy as np
+#
+meta_file = 'model_meta.npz'
+#
+# Node sets: npz key and instance set name
+node_sets = [('leftplanarnodes', 'END NODES L PLANAR'),
+('rightplanarnodes', 'END NODES R PLANAR'),
+('leftnodes', 'END NODES L'),
+('rightnodes', 'END NODES R'),
+('centrenodes', 'CENTRE NODES'),
+('innernodes', 'INNER NODES')]
+#
+# ********************************************************************************
+# Read/write
+# ********************************************************************************
+#
+# Write node sets {key: labels} and scalars {key: value} (np.savez stores the
+# members uncompressed, so load_meta can memory-map them)
+def write_meta(sets, scalars, path=meta_file):
+	arrays = dict((key, np.asarray(labels, dtype=np.int32)) for key, labels in sets.items())
+	arrays.update((key, np.asarray(value, dtype=float)) for key, value in scalars.items())
+	metaFile = open(path, 'wb')
+	np.savez(metaFile, **arrays)
+	metaFile.close()
+#
+# Array of a .npy member of an npz file starting at offset: memory-mapped
+# (mmap_mode) in place where it has elements, read otherwise
+def read_member(path, metaFile, offset, mmap_mode):
+	metaFile.seek(offset)
+	version = np.lib.format.read_magic(metaFile)
+	if version == (1, 0):
+		shape, fortran, dtype = np.lib.format.read_array_header_1_0(metaFile)
+	else:
+		shape, fortran, dtype = np.lib.format.read_array_header_2_0(metaFile)
+	size = int(np.prod(shape))
+	if mmap_mode is None or size == 0 or shape == ():
+		return np.frombuffer(metaFile.read(size * dtype.itemsize), dtype=dtype).reshape(shape,
+		order='F' if fortran else 'C').copy()
+	return np.memmap(path, dtype=dtype, mode=mmap_mode, offset=metaFile.tell(), shape=shape,
+	order='F' if fortran else 'C')
+#
+# Arrays of a model_meta.npz file {key: array}. The node sets are memory-mapped
+# from the stored members of the archive (local file header: 30 bytes, name and
+# extra field), so no label array is copied on load.
+def load_meta(path=meta_file, mmap_mode='r'):
+	archive = zipfile.ZipFile(path)
+	metaFile = open(path, 'rb')
+	try:
+		meta = {}
+		for info in archive.infolist():
+			if info.compress_type != zipfile.ZIP_STORED:
+				raise ValueError('{0}: {1} is compressed'.format(path, info.filename))
+			metaFile.seek(info.header_offset)
+			name_length, extra_length = struct.unpack('<HH', metaFile.read(30)[26:30])
+			offset = info.header_offset + 30 + name_length + extra_length
+			meta[info.filename[:-4]] = read_member(path, metaFile, offset, mmap_mode)
+	finally:
+		metaFile.close()
+		archive.close()
+	return meta
+#
+# Labels of a node set as a tuple of ints (for SetFromNodeLabels)
+def labels(meta, key):
+	return tuple(meta[key].tolist())
+#
+# Scalar as a float, or an int for face and edge labels
+def scalar(meta, key, kind=float):
+	return kind(meta[key])
+#
+# ********************************************************************************
@@ -0,0 +1,124 @@
+# ********************************************************************************
+#
+#		Output Database Extraction Benchmark
+#
+#		Builds synthetic RECOIL and STIFFNESS databases with the odbAccess stand-in
+#		and compares the single-pass extraction with the per-script approach of
+#		csa_out.py, fs_out.py and rcp_out.py (full-field transforms).
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import os
+import math
+import time
+import shutil
+import tempfile
+import numpy as np
+import odb_mock
+from odb_mock import CYLINDRICAL, CARTESIAN, openOdb
+from odb_extract import recoil_metrics, crimp_metrics, toolNames, stentName
+#
+# ********************************************************************************
+# User inputs
+# ********************************************************************************
+#
+# Synthetic mesh (nodes along, around) and frames per step
+mesh = {'n_axial':200, 'n_circ':120}
+frames = 20
+surfaceAreaOuter = 10.0
+#
+# ********************************************************************************
+# Per-script extraction
+# ********************************************************************************
+#
+# Radial (cylindrical component 1) or Cartesian values of a set, transforming
+# the whole field first as in the *_out.py scripts
+def legacy_values(field, region, csys):
+	return [v.data for v in field.getTransformedField(datumCsys=csys).getSubset(region=region).values]
+#
+def legacy_csa_fs(path):
+	odb = openOdb(path, readOnly=True)
+	instance = odb.rootAssembly.instances[stentName]
+	cyl = odb.rootAssembly.DatumCsysByThreePoints(name='REFCSYS', coordSysType=CYLINDRICAL,
+	origin=(0,0,0), point1=(0.0, 0.0, -1.0), point2=(0.0, 1.0, 0.0))
+	lastFrame = odb.steps['RECOIL-2'].frames[-1]
+	radial = [v[0] for v in legacy_values(lastFrame.fieldOutputs['COORD'], instance.nodeSets['INNER NODES'], cyl)]
+	CSA = math.fabs(math.pi * (sum(radial) / len(radial)) ** 2)
+	odb.close()
+	#
+	odb = openOdb(path, readOnly=True)
+	instance = odb.rootAssembly.instances[stentName]
+	cart = odb.rootAssembly.DatumCsysByThreePoints(name='REFCSYS', coordSysType=CARTESIAN,
+	origin=(0,0,0), point1=(1.0, 0.0, 0.0), point2=(0.0, 1.0, 0.0))
+	x = []
+	for stepName, k in (('INFLATE', 0), ('RECOIL-2', -1)):
+		for setName in ('END NODES L PLANAR', 'END NODES R PLANAR'):
+			field = odb.steps[stepName].frames[k].fieldOutputs['COORD']
+			x.append(np.average([v[0] for v in legacy_values(field, instance.nodeSets[setName], cart)]))
+	FS = math.fabs(((x[2] - x[3]) - (x[0] - x[1])) / (x[0] - x[1]) * 100.0)
+	odb.close()
+	return CSA, FS
+#
+def legacy_rcp(path):
+	odb = openOdb(path, readOnly=True)
+	step = odb.steps['CRIMP-2']
+	cyl = odb.rootAssembly.DatumCsysByThreePoints(name='REFCSYS', coordSysType=CYLINDRICAL,
+	origin=(0,0,0), point1=(0.0, 0.0, 1.0), point2=(0.0, 1.0, 0.0))
+	force = []
+	start = time.time()
+	for name in toolNames:
+		rp = odb.rootAssembly.instances[name].nodeSets['RP']
+		for frame in step.frames:
+			force.append(math.fabs(legacy_values(frame.fieldOutputs['RF'], rp, cyl)[0][0]))
+	n = len(step.frames)
+	frameTime = (time.time() - start) / n
+	RFSUM = [sum(force[i::n]) for i in range(n)]
+	inner = odb.rootAssembly.nodeSets['INNER NODES ASSY']
+	radius = []
+	for frame in step.frames:
+		radial = [v[0] for v in legacy_values(frame.fieldOutputs['COORD'], inner, cyl)]
+		radius.append(sum(radial) / len(radial))
+	CRIMP = np.fabs((np.array(radius) - radius[0]) / radius[0] * 100)
+	odb.close()
+	return (np.interp(10.0, CRIMP, RFSUM) / surfaceAreaOuter * 10**6) / 8, frameTime
+#
+# ********************************************************************************
+# Benchmark
+# ********************************************************************************
+#
+def timed(fun):
+	start = time.time()
+	value = fun()
+	return value, time.time() - start
+#
+def single_pass(recoil_path, stiffness_path):
+	odb = openOdb(recoil_path)
+	recoil = recoil_metrics(odb)
+	odb.close()
+	odb = openOdb(stiffness_path)
+	crimp = crimp_metrics(odb, surfaceAreaOuter)
+	odb.close()
+	return recoil['csa'], recoil['fs'], crimp['rcp'], np.mean(crimp['frame_times'])
+#
+if __name__ == '__main__':
+	folder = tempfile.mkdtemp()
+	try:
+		recoil_path = os.path.join(folder, 'RECOIL.odb.npz')
+		stiffness_path = os.path.join(folder, 'STIFFNESS.odb.npz')
+		odb_mock.build_synthetic(recoil_path, stiffness_path, frames=frames, **mesh)
+		(csa, fs), t_csa_fs = timed(lambda: legacy_csa_fs(recoil_path))
+		(rcp, rf_frame), t_rcp = timed(lambda: legacy_rcp(stiffness_path))
+		new, t_new = timed(lambda: single_pass(recoil_path, stiffness_path))
+		n_nodes = 2 * mesh['n_axial'] * mesh['n_circ']
+		print('{0} stent nodes, {1} frames'.format(n_nodes, frames))
+		print('per script:  {0:.3f} s  csa {1:.6f}  fs {2:.6f}  rcp {3:.6f}'.format(t_csa_fs + t_rcp, csa, fs, rcp))
+		print('single pass: {0:.3f} s  csa {1:.6f}  fs {2:.6f}  rcp {3:.6f}'.format(t_new, new[0], new[1], new[2]))
+		print('per frame: RF by tool {0:.2f} ms, RF and COORD batched {1:.2f} ms'.format(
+		rf_frame * 1e3, new[3] * 1e3))
+	finally:
+		shutil.rmtree(folder)
+#
+# ********************************************************************************
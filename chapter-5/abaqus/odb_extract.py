@@ -0,0 +1,205 @@
+# ********************************************************************************
+#
+#		Abaqus Standard 2016 Post-Processing Script
+#
+#		Reads the RECOIL and STIFFNESS output databases (.odb) once each and
+# 		calculates the cross-sectional area, foreshortening and radial collapse
+# 		pressure of parametric stent geometries in a single pass
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import sys
+import math
+import time
+import numpy as np
+from radial import radial_stats
+from lumen import lumen_metrics
+from model_meta import load_meta, scalar
+try:
+	from abaqusConstants import CYLINDRICAL
+	from odbAccess import openOdb
+except ImportError:
+	# NumPy stand-in (reads synthetic RECOIL.odb.npz / STIFFNESS.odb.npz files)
+	from odb_mock import CYLINDRICAL, openOdb
+#
+# ********************************************************************************
+# Inputs
+# ********************************************************************************
+#
+# Stent and crimp tool instances
+stentName = 'MULTILINK-STENT-1'
+toolNames = ['CRIMP TOOL-1', 'CRIMP TOOL-1-rad-2',
+'CRIMP TOOL-1-rad-3', 'CRIMP TOOL-1-rad-4',
+'CRIMP TOOL-1-rad-5', 'CRIMP TOOL-1-rad-6',
+'CRIMP TOOL-1-rad-7', 'CRIMP TOOL-1-rad-8']
+#
+# Diameter reductions (%) at which the crimp force is interpolated (the first
+# gives the radial collapse pressure)
+crimpTargets = [10.0]
+#
+# ********************************************************************************
+# Field access
+# ********************************************************************************
+#
+# Cylindrical system about the stent (x) axis
+def cylindrical_csys(odb):
+	return odb.rootAssembly.DatumCsysByThreePoints(name='REFCSYS',
+	coordSysType=CYLINDRICAL, origin=(0,0,0),
+	point1=(0.0, 0.0, 1.0), point2=(0.0, 1.0, 0.0) )
+#
+# Values (n, components) of a field output on a node set, transformed to csys.
+# The subset is taken before the transform, so only the nodes of the set are
+# transformed, and the values are read as bulk data blocks.
+def region_values(field, region, csys=None):
+	subset = field.getSubset(region=region)
+	if csys is not None:
+		subset = subset.getTransformedField(datumCsys=csys)
+	return np.concatenate([np.asarray(block.data, dtype=float) for block in subset.bulkDataBlocks])
+#
+# Assembly node set of the reference points of all crimp tools (created once)
+def tool_rp_set(odb):
+	a = odb.rootAssembly
+	if 'TOOL RPS' not in a.nodeSets.keys():
+		nodeLabels = [(name, tuple(node.label for node in a.instances[name].nodeSets['RP'].nodes))
+		for name in toolNames]
+		a.NodeSetFromNodeLabels(name='TOOL RPS', nodeLabels=nodeLabels)
+	return a.nodeSets['TOOL RPS']
+#
+# Radial reaction force of each crimp tool (in toolNames order) in one frame,
+# with a single subset and transform of the RF field for all tools
+def tool_forces(frame, toolSet, csys):
+	subset = frame.fieldOutputs['RF'].getSubset(region=toolSet).getTransformedField(datumCsys=csys)
+	RF = np.zeros(len(toolNames))
+	for block in subset.bulkDataBlocks:
+		RF[toolNames.index(block.instance.name)] += np.sum(np.asarray(block.data, dtype=float)[:,0])
+	return RF
+#
+# Radial reaction forces (frames x tools) of a step and the extraction time (s)
+# of each frame
+def tool_force_history(odb, step, csys):
+	toolSet = tool_rp_set(odb)
+	RF = np.empty((len(step.frames), len(toolNames)))
+	frameTimes = np.empty(len(step.frames))
+	for k, frame in enumerate(step.frames):
+		start = time.time()
+		RF[k] = tool_forces(frame, toolSet, csys)
+		frameTimes[k] = time.time() - start
+	return RF, frameTimes
+#
+# Generator of the diameter reduction (%), summed radial tool force and tool
+# forces of each frame of a crimp step, reading RF and COORD of a frame only
+# when it is requested. The inner node radii are taken from the Cartesian COORD
+# values, relative to the frame 0 mean radius.
+def crimp_history(odb, step, csys):
+	toolSet = tool_rp_set(odb)
+	inner = odb.rootAssembly.nodeSets['INNER NODES ASSY']
+	initial = None
+	for frame in step.frames:
+		stats = radial_stats(region_values(frame.fieldOutputs['COORD'], inner), initial)
+		initial = stats['initial']
+		RF = tool_forces(frame, toolSet, csys)
+		yield float(stats['crimp']), np.sum(np.fabs(RF)), RF
+#
+# Reads a crimp history until the diameter reduction passes the largest target,
+# returning the CRIMP, RFSUM and RF (frames x tools) arrays of the frames read,
+# the read time (s) of each frame and the summed force at each target
+def read_crimp(history, targets=crimpTargets):
+	last = max(targets)
+	rows = []
+	frameTimes = []
+	start = time.time()
+	for row in history:
+		rows.append(row)
+		frameTimes.append(time.time() - start)
+		if row[0] >= last:
+			break
+		start = time.time()
+	CRIMP = np.array([row[0] for row in rows])
+	RFSUM = np.array([row[1] for row in rows])
+	RF = np.array([row[2] for row in rows])
+	return CRIMP, RFSUM, RF, np.array(frameTimes), np.interp(targets, CRIMP, RFSUM)
+#
+# ********************************************************************************
+# Metrics
+# ********************************************************************************
+#
+# Mean and minimum recoil radius, cross-sectional area and minimum and mean slice
+# lumen area post-recoil, expanded length and foreshortening from RECOIL.odb. The end node x coordinates are read
+# in the global system (the reference system of fs_out.py), so need no transform;
+# all three end nodes of each side are averaged (fs_out.py reads the second R
+# node twice).
+def recoil_metrics(odb):
+	instance = odb.rootAssembly.instances[stentName]
+	inner = instance.nodeSets['INNER NODES']
+	left = instance.nodeSets['END NODES L PLANAR']
+	right = instance.nodeSets['END NODES R PLANAR']
+	#
+	first = odb.steps['INFLATE'].frames[0].fieldOutputs['COORD']
+	last = odb.steps['RECOIL-2'].frames[-1].fieldOutputs['COORD']
+	innerCoords = region_values(last, inner)
+	stats = radial_stats(innerCoords)
+	lumen = lumen_metrics(innerCoords)
+	recoilRadiusAve = float(stats['mean'])
+	initialLength = np.mean(region_values(first, left)[:,0]) - np.mean(region_values(first, right)[:,0])
+	finalLength = np.mean(region_values(last, left)[:,0]) - np.mean(region_values(last, right)[:,0])
+	#
+	FS = math.fabs((finalLength - initialLength) / initialLength * 100.0)
+	return {'recoil_radius':recoilRadiusAve, 'min_radius':float(stats['min']), 'csa':float(stats['csa']),
+	'min_lumen_area':float(lumen['min_area']), 'mean_lumen_area':float(lumen['mean_area']),
+	'length':finalLength, 'fs':FS}
+#
+# Diameter reduction (%), radial tool forces (frames x tools) and their sum for
+# the CRIMP-2 frames up to the largest target, and the radial collapse pressure
+# at each target from STIFFNESS.odb (the first target gives rcp)
+def crimp_metrics(odb, surfaceAreaOuter, targets=crimpTargets):
+	csys = cylindrical_csys(odb)
+	step = odb.steps['CRIMP-2']
+	CRIMP, RFSUM, RF, frameTimes, forces = read_crimp(crimp_history(odb, step, csys), targets)
+	pressures = (forces / surfaceAreaOuter * 10**6) / 8
+	return {'crimp':CRIMP, 'rf':RF, 'rfsum':RFSUM, 'rcp':pressures[0], 'rcp_targets':pressures,
+	'frame_times':frameTimes, 'frames_read':len(CRIMP), 'frames_total':len(step.frames)}
+#
+# ********************************************************************************
+# Output
+# ********************************************************************************
+#
+def write_value(path, value):
+	paramsFile = open(path, 'w')
+	paramsFile.write(str(value))
+	paramsFile.close()
+#
+# Usage: abaqus python odb_extract.py [recoil] [stiffness] (default both)
+if __name__ == '__main__':
+	jobs = sys.argv[1:] or ['recoil', 'stiffness']
+	#
+	if 'recoil' in jobs:
+		odb = openOdb('RECOIL.odb', readOnly=True)
+		try:
+			metrics = recoil_metrics(odb)
+		finally:
+			odb.close()
+		print('CROSS-SECTIONAL AREA = {0}'.format(metrics['csa']))
+		print('FORESHORTENING = {0}'.format(metrics['fs']))
+		print('MINIMUM LUMEN AREA = {0}'.format(metrics['min_lumen_area']))
+		write_value('recoil_radius.txt', metrics['recoil_radius'])
+		write_value('output_csa.txt', metrics['csa'])
+		write_value('output_mla.txt', metrics['min_lumen_area'])
+		write_value('expandedstentlength.txt', metrics['length'])
+		write_value('output_fs.txt', metrics['fs'])
+	#
+	if 'stiffness' in jobs:
+		surfaceAreaOuter = scalar(load_meta(), 'surfaceAreaOuter')
+		odb = openOdb('STIFFNESS.odb', readOnly=True)
+		try:
+			metrics = crimp_metrics(odb, surfaceAreaOuter)
+		finally:
+			odb.close()
+		print('RADIAL COLLAPSE PRESSURE = {0}'.format(metrics['rcp']))
+		print('FRAMES READ = {0} of {1}, {2:.4f} s PER FRAME'.format(metrics['frames_read'],
+		metrics['frames_total'], np.mean(metrics['frame_times'])))
+		write_value('output_rcp.txt', metrics['rcp'])
+#
+# ********************************************************************************
@@ -0,0 +1,256 @@
+# ********************************************************************************
+#
+#		Abaqus Output Database (.odb) Stand-In
+#
+#		NumPy-backed stand-in for the parts of odbAccess used by the post-processing
+#		scripts (openOdb, steps, frames, field output, node sets and datum csys), and
+#		a builder of synthetic RECOIL and STIFFNESS databases for testing.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import numpy as np
+#
+CARTESIAN = 'CARTESIAN'
+CYLINDRICAL = 'CYLINDRICAL'
+#
+# ********************************************************************************
+# Model
+# ********************************************************************************
+#
+# Datum coordinate system from an origin, a point on axis 1 and a point in the
+# 1-2 plane (axis 3 is the cylinder axis of a cylindrical system)
+class DatumCsys(object):
+	def __init__(self, name, coordSysType, origin, point1, point2):
+		self.name = name
+		self.coordSysType = coordSysType
+		self.origin = np.asarray(origin, dtype=float)
+		e1 = np.asarray(point1, dtype=float) - self.origin
+		e1 /= np.linalg.norm(e1)
+		e2 = np.asarray(point2, dtype=float) - self.origin
+		e2 -= np.dot(e2, e1) * e1
+		e2 /= np.linalg.norm(e2)
+		self.axes = np.array([e1, e2, np.cross(e1, e2)])
+	#
+	# Components (n, 3) of vectors data at points x in this system
+	def transform(self, data, x):
+		if self.coordSysType == CARTESIAN:
+			return np.dot(data, self.axes.T)
+		axis = self.axes[2]
+		r = x - self.origin
+		r -= np.outer(np.dot(r, axis), axis)
+		er = r / np.linalg.norm(r, axis=1)[:,None]
+		et = np.cross(axis, er)
+		return np.column_stack((np.sum(data * er, axis=1), np.sum(data * et, axis=1), np.dot(data, axis)))
+#
+class OdbMeshNode(object):
+	def __init__(self, label):
+		self.label = label
+#
+# Node set (labels of each instance)
+class OdbSet(object):
+	def __init__(self, name, labels):
+		self.name = name
+		self.labels = labels
+	#
+	# Nodes of an instance-level set
+	@property
+	def nodes(self):
+		return [OdbMeshNode(int(label)) for labels in self.labels.values() for label in labels]
+#
+class OdbInstance(object):
+	def __init__(self, name, labels, coords):
+		self.name = name
+		self.labels = labels
+		self.coords = coords
+		self.nodeSets = {}
+#
+class OdbAssembly(object):
+	def __init__(self):
+		self.instances = {}
+		self.nodeSets = {}
+	#
+	def DatumCsysByThreePoints(self, name, coordSysType, origin, point1, point2):
+		return DatumCsys(name, coordSysType, origin, point1, point2)
+	#
+	# nodeLabels: sequence of (instance name, labels)
+	def NodeSetFromNodeLabels(self, name, nodeLabels):
+		self.nodeSets[name] = OdbSet(name, dict((inst, np.array(sorted(labels), dtype=np.int32))
+		for inst, labels in nodeLabels))
+		return self.nodeSets[name]
+#
+# ********************************************************************************
+# Results
+# ********************************************************************************
+#
+class FieldValue(object):
+	def __init__(self, instance, nodeLabel, data):
+		self.instance = instance
+		self.nodeLabel = nodeLabel
+		self.data = data
+#
+class FieldBulkData(object):
+	def __init__(self, instance, nodeLabels, data):
+		self.instance = instance
+		self.nodeLabels = nodeLabels
+		self.data = data
+#
+# Nodal vector field: per instance node labels, values (n, 3) and the current
+# node coordinates (n, 3) used by cylindrical transforms
+class FieldOutput(object):
+	def __init__(self, name, blocks):
+		self.name = name
+		self._blocks = blocks
+	#
+	def getSubset(self, region):
+		blocks = {}
+		for inst, labels in region.labels.items():
+			if inst not in self._blocks:
+				continue
+			own, data, x = self._blocks[inst]
+			idx = np.searchsorted(own, labels)
+			blocks[inst] = (own[idx], data[idx], x[idx])
+		return FieldOutput(self.name, blocks)
+	#
+	def getTransformedField(self, datumCsys):
+		return FieldOutput(self.name, dict((inst, (labels, datumCsys.transform(data, x), x))
+		for inst, (labels, data, x) in self._blocks.items()))
+	#
+	@property
+	def bulkDataBlocks(self):
+		return [FieldBulkData(OdbInstance(inst, None, None), labels, data.astype(np.float32))
+		for inst, (labels, data, x) in sorted(self._blocks.items())]
+	#
+	@property
+	def values(self):
+		return [FieldValue(OdbInstance(inst, None, None), int(label), tuple(float(v) for v in row))
+		for inst, (labels, data, x) in sorted(self._blocks.items())
+		for label, row in zip(labels, data.astype(np.float32))]
+#
+class OdbFrame(object):
+	def __init__(self, fieldOutputs):
+		self.fieldOutputs = fieldOutputs
+#
+class OdbStep(object):
+	def __init__(self, name, frames):
+		self.name = name
+		self.frames = frames
+#
+class Odb(object):
+	def __init__(self, path):
+		self.path = path
+		self.rootAssembly = OdbAssembly()
+		self.steps = {}
+	#
+	def close(self):
+		pass
+#
+# ********************************************************************************
+# Storage
+# ********************************************************************************
+#
+# Synthetic databases are stored in a .npz file with keys
+#   nodes|{instance}, coords|{instance}       labels, initial coordinates
+#   set|{instance}|{set}, aset|{set}|{instance}   instance and assembly node sets
+#   field|{step}|{field}|{instance}           values (frames, n, 3)
+#   coord|{step}|{instance}                   current coordinates (frames, n, 3)
+def openOdb(path, readOnly=True):
+	npz = np.load(path if path.endswith('.npz') else path + '.npz')
+	data = dict((key, npz[key]) for key in npz.files)
+	odb = Odb(path)
+	a = odb.rootAssembly
+	keys = [key.split('|') for key in data]
+	for key in keys:
+		if key[0] == 'nodes':
+			a.instances[key[1]] = OdbInstance(key[1], data['|'.join(key)], data['coords|' + key[1]])
+	for key in keys:
+		if key[0] == 'set':
+			a.instances[key[1]].nodeSets[key[2]] = OdbSet(key[2], {key[1]:data['|'.join(key)]})
+		elif key[0] == 'aset':
+			a.nodeSets.setdefault(key[1], OdbSet(key[1], {})).labels[key[2]] = data['|'.join(key)]
+	fields = {}
+	for key in keys:
+		if key[0] == 'field':
+			fields.setdefault(key[1], {}).setdefault(key[2], {})[key[3]] = data['|'.join(key)]
+	for step, step_fields in fields.items():
+		n_frames = min(len(v) for f in step_fields.values() for v in f.values())
+		frames = []
+		for k in range(n_frames):
+			outputs = {}
+			for name, per_inst in step_fields.items():
+				outputs[name] = FieldOutput(name, dict((inst, (a.instances[inst].labels, v[k],
+				data['coord|{0}|{1}'.format(step, inst)][k])) for inst, v in per_inst.items()))
+			frames.append(OdbFrame(outputs))
+		odb.steps[step] = OdbStep(step, frames)
+	return odb
+#
+# ********************************************************************************
+# Synthetic databases
+# ********************************************************************************
+#
+stent_instance = 'MULTILINK-STENT-1'
+tool_instances = ['CRIMP TOOL-1'] + ['CRIMP TOOL-1-rad-{0}'.format(k) for k in range(2, 9)]
+#
+# Stent nodes on a cylinder about the x axis (n_axial x n_circ per radial layer,
+# inner and outer layers), with the end node sets used by the scripts
+def stent_nodes(radius=0.7, thickness=0.15, length=5.0, n_axial=50, n_circ=60):
+	x = np.linspace(0.0, length, n_axial)
+	theta = np.linspace(0.0, 2 * np.pi, n_circ, endpoint=False)
+	X, T, R = np.meshgrid(x, theta, [radius, radius + thickness], indexing='ij')
+	coords = np.column_stack((X.ravel(), R.ravel() * np.cos(T.ravel()), R.ravel() * np.sin(T.ravel())))
+	labels = np.arange(1, len(coords) + 1, dtype=np.int32)
+	inner = labels[R.ravel() == radius]
+	left = labels[(X.ravel() == length) & (R.ravel() == radius)][:3]
+	right = labels[(X.ravel() == 0.0) & (R.ravel() == radius)][:3]
+	return labels, coords, inner, left, right
+#
+# Coordinates with the radius about the x axis scaled by s and x scaled by sx
+def deform(coords, s, sx=1.0):
+	return coords * [sx, s, s]
+#
+# Synthetic RECOIL database (INFLATE to expand x radius, RECOIL-2 back to recoil x
+# radius with the length scaled by shorten) and STIFFNESS database (CRIMP-2 to
+# crimp x the recoiled radius, with the radial reaction force of each tool rising
+# linearly to force). Paths are written with a .npz extension.
+def build_synthetic(recoil_path, stiffness_path, frames=20, expand=1.6, recoil=1.5,
+shorten=0.97, crimp=0.8, force=2.0, **kwargs):
+	labels, coords, inner, left, right = stent_nodes(**kwargs)
+	tool_labels = np.array([1], dtype=np.int32)
+	angles = np.arange(8) * np.pi / 4
+	tool_coords = [np.array([[2.5, 2.0 * np.cos(t), 2.0 * np.sin(t)]]) for t in angles]
+	model = {'nodes|' + stent_instance:labels, 'coords|' + stent_instance:coords,
+	'set|{0}|INNER NODES'.format(stent_instance):inner,
+	'set|{0}|END NODES L PLANAR'.format(stent_instance):left,
+	'set|{0}|END NODES R PLANAR'.format(stent_instance):right,
+	'aset|INNER NODES ASSY|' + stent_instance:inner}
+	#
+	# RECOIL
+	f = np.linspace(0.0, 1.0, frames)
+	inflate = np.array([deform(coords, 1.0 + (expand - 1.0) * s) for s in f])
+	recoil_c = np.array([deform(coords, expand + (recoil - expand) * s, 1.0 + (shorten - 1.0) * s) for s in f])
+	arrays = dict(model)
+	arrays.update({'field|INFLATE|COORD|' + stent_instance:inflate,
+	'coord|INFLATE|' + stent_instance:inflate,
+	'field|RECOIL-2|COORD|' + stent_instance:recoil_c,
+	'coord|RECOIL-2|' + stent_instance:recoil_c})
+	np.savez(recoil_path, **arrays)
+	#
+	# STIFFNESS
+	start = recoil_c[-1]
+	crimp_c = np.array([deform(start, 1.0 + (crimp - 1.0) * s) for s in f])
+	arrays = dict(model)
+	arrays.update({'field|CRIMP-2|COORD|' + stent_instance:crimp_c,
+	'coord|CRIMP-2|' + stent_instance:crimp_c,
+	'field|CRIMP-2|RF|' + stent_instance:np.zeros_like(crimp_c)})
+	for name, x, t in zip(tool_instances, tool_coords, angles):
+		er = np.array([0.0, np.cos(t), np.sin(t)])
+		rf = np.array([[force * s * er] for s in f])
+		arrays.update({'nodes|' + name:tool_labels, 'coords|' + name:x,
+		'set|{0}|RP'.format(name):tool_labels,
+		'field|CRIMP-2|RF|' + name:rf,
+		'coord|CRIMP-2|' + name:np.repeat(x[None], frames, axis=0)})
+	np.savez(stiffness_path, **arrays)
+#
+# ********************************************************************************
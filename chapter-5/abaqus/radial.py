@@ -0,0 +1,53 @@
+# ********************************************************************************
+#
+#		Radial Measures of Node Sets
+#
+#		Radius of the nodes of a set about the stent axis from Cartesian COORD
+#		arrays (frames, nodes, 3), with the mean and minimum (lumen) radius, CSA
+#		and diameter reduction of every frame in one vectorised call.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import math
+import numpy as np
+#
+# Stent axis (the cylinder axis of the REFCSYS systems of the *_out.py scripts)
+origin = (0.0, 0.0, 0.0)
+axis = (1.0, 0.0, 0.0)
+#
+# ********************************************************************************
+# Radius
+# ********************************************************************************
+#
+# Projection onto the plane normal to the axis, computed once in place of a
+# cylindrical transform of every node and frame
+def projection(axis=axis):
+	e = np.asarray(axis, dtype=float)
+	e = e / np.linalg.norm(e)
+	return np.eye(3) - np.outer(e, e)
+#
+# Radius (...) of Cartesian coordinates (..., 3) about the axis
+def radii(coords, origin=origin, axis=axis):
+	r = np.dot(np.asarray(coords, dtype=float) - origin, projection(axis))
+	return np.sqrt(np.einsum('...i,...i->...', r, r))
+#
+# ********************************************************************************
+# Frame measures
+# ********************************************************************************
+#
+# Mean and minimum radius, CSA (pi * mean radius^2) and diameter reduction (%)
+# of each frame of coords (frames, nodes, 3), or of one frame (nodes, 3). The
+# reduction is relative to the mean radius of frame 0, or to initial (the frame
+# 0 mean from an earlier call) when frames are passed one at a time.
+def radial_stats(coords, initial=None, origin=origin, axis=axis):
+	r = radii(coords, origin, axis)
+	mean = np.mean(r, axis=-1)
+	if initial is None:
+		initial = mean.flat[0]
+	return {'mean':mean, 'min':np.min(r, axis=-1), 'csa':math.pi * mean**2,
+	'crimp':np.fabs((mean - initial) / initial * 100), 'initial':initial}
+#
+# ********************************************************************************
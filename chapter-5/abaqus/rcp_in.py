@@ -40,6 +40,7 @@ import visualization
 import xyPlot
 import displayGroupOdbToolset as dgo
 import connectorBehavior
+from model_meta import load_meta, labels, scalar
 #
 # Import .cae file
 mdb.openAuxMdb(pathName='RECOIL.cae')
@@ -110,10 +111,8 @@ name='Predefined Field-1', updateReferenceConfiguration=ON)
 a = m.rootAssembly
 i = a.instances['MULTILINK-STENT-1']
 #
-paramsFile = open('axialedge.txt','r')
-edgelabel = [line for line in paramsFile]
-edgelabel = edgelabel[0]
-edgelabel = eval(edgelabel)
+meta = load_meta()
+edgelabel = scalar(meta, 'axialedge', int)
 #
 p = m.parts['CRIMP TOOL']
 a.Instance(dependent=ON, name='CRIMP TOOL-1', part=p)
@@ -128,25 +127,16 @@ a.RadialInstancePattern(axis=(1.0, 0.0, 0.0),
 instanceList=('CRIMP TOOL-1', ), number=8, point=(2.0, 0.0, 0.0), 
 totalAngle=360.0)
 #
-paramsFile = open('centrenodes.txt','r')
-nodelabels = [line for line in paramsFile]
-nodelabels = nodelabels[0]
-nodelabels = eval(nodelabels)
+nodelabels = labels(meta, 'centrenodes')
 a.SetFromNodeLabels(name='CENTRE NODES ASSY', nodeLabels=(('MULTILINK-STENT-1', 
 nodelabels), ))
 #
-paramsFile = open('innernodes.txt','r')
-nodelabels = [line for line in paramsFile]
-nodelabels = nodelabels[0]
-nodelabels = eval(nodelabels)
+nodelabels = labels(meta, 'innernodes')
 a.SetFromNodeLabels(name='INNER NODES ASSY', nodeLabels=(('MULTILINK-STENT-1', 
 nodelabels), ))
 #
 # Assembly level surface generation
-paramsFile = open('outersurfaceface.txt','r')
-facelabel = [line for line in paramsFile]
-facelabel = facelabel[0]
-facelabel = eval(facelabel)
+facelabel = scalar(meta, 'outersurfaceface', int)
 outersurfaceassy = i.faces[facelabel].getFacesByFaceAngle(angle=20.0)
 a.Surface(name='OUTER ASSY', side1Faces=outersurfaceassy)
 #
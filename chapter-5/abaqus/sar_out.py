@@ -19,15 +19,14 @@ import sys
 import math
 import csv
 import numpy as np
+from model_meta import load_meta, scalar
 #
 # ********************************************************************************
 # Output
 # ********************************************************************************
 #
 # Define output
-paramsFile = open('surfaceAreaOuter.txt','r')
-surf_area = [line for line in paramsFile]
-surf_area = eval(surf_area[0])
+surf_area = scalar(load_meta(), 'surfaceAreaOuter')
 #
 # Define (crimped) stent parameters
 outer_rad = 0.9
@@ -0,0 +1,136 @@
+# ********************************************************************************
+#
+#		Adaptive (Sequential) Sampling Plan
+#
+#		Starts from a small optimal LHC, fits the quadratic response surface models
+#		and adds batches of designs of maximum prediction variance until the
+#		leave-one-out error of every response reaches the target accuracy.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import os
+import sys
+import numpy as np
+from lhc import optimal_lhc, scale
+#
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rsm'))
+from rsm_fit import IncrementalFit, givens_insert, leverage
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'optimisation'))
+from surrogate import rsm_features, rsm_models_batch
+#
+# ********************************************************************************
+# User inputs
+# ********************************************************************************
+#
+# Design parameters and bounds (ar, w, t, l)
+params_lb = np.array([1.0, 0.00010, 0.00010, 0.00090])
+params_ub = np.array([2.3, 0.00020, 0.00020, 0.00120])
+#
+# Conversion of the design parameters to the response surface units (ar, um)
+params_units = np.array([1.0, 1e6, 1e6, 1e6])
+#
+# Initial LHC size, infill batch size, maximum number of designs and target
+# leave-one-out error (fraction of each response range)
+n_initial = 20
+batch_size = 4
+max_points = 40
+target_error = 0.05
+#
+# ********************************************************************************
+# Infill criteria
+# ********************************************************************************
+#
+# Greedy batch of n candidates (RSM units) of maximum prediction variance. The
+# variance only depends on the designs, so each chosen design is inserted into a
+# copy of R before the next is chosen and the batch spreads out.
+def max_variance_batch(R, candidates, n):
+	R = R.copy()
+	chosen = []
+	for b in range(n):
+		v = leverage(R, candidates)
+		v[chosen] = -1.0
+		i = int(np.argmax(v))
+		chosen.append(i)
+		givens_insert(R, rsm_features(candidates[i])[0])
+	return chosen
+#
+# Greedy batch of n candidates (unit cube) farthest from the designs U and from
+# each other, used while there are too few results to fit the models
+def maximin_batch(U, candidates, n):
+	dist = np.full(len(candidates), np.inf)
+	for u in U:
+		dist = np.minimum(dist, np.sum((candidates - u)**2, axis=1))
+	chosen = []
+	for b in range(n):
+		i = int(np.argmax(dist))
+		chosen.append(i)
+		dist = np.minimum(dist, np.sum((candidates - candidates[i])**2, axis=1))
+	return chosen
+#
+# ********************************************************************************
+# Sequential design
+# ********************************************************************************
+#
+# evaluate(P) runs the (expensive) analyses of a batch of designs P (n, 4) in the
+# units of lb and ub and returns their responses (n, 4: csa, fs, par, rs). The
+# incremental fit is returned with the designs (RSM units) and responses in .X
+# and .Y and the leave-one-out error after each batch in .history.
+def sequential_design(evaluate, lb, ub, units=params_units, n_initial=n_initial,
+batch_size=batch_size, max_points=max_points, target=target_error,
+n_candidates=2000, seed=None):
+	rng = np.random.RandomState(seed)
+	lb = np.asarray(lb, dtype=float)
+	ub = np.asarray(ub, dtype=float)
+	fit = IncrementalFit()
+	fit.history = []
+	#
+	U = optimal_lhc(n_initial, len(lb), seed=seed)
+	while True:
+		P = scale(U, lb, ub)
+		fit.add_rows(P * units, evaluate(P))
+		error = fit.loo_error()
+		fit.history.append((len(fit.X), error))
+		if error is not None and np.max(error) < target:
+			break
+		n = min(batch_size, max_points - len(fit.X))
+		if n <= 0:
+			break
+		C = rng.rand(n_candidates, len(lb))
+		if fit.coeff() is None:
+			U = C[maximin_batch((fit.X / units - lb) / (ub - lb), C, n)]
+		else:
+			U = C[max_variance_batch(fit.R, scale(C, lb, ub) * units, n)]
+	return fit
+#
+# ********************************************************************************
+# Output
+# ********************************************************************************
+#
+# Stand-in evaluation (replace with the SolidWorks and Abaqus analyses of each
+# design): the current response surface models with a non-quadratic term and
+# noise, each a fraction of the response range, so the quadratic models do not
+# fit the initial designs exactly and infill designs are needed
+def stand_in(bend=0.1, noise=0.02, seed=0):
+	rng = np.random.RandomState(seed)
+	lb, ub = params_lb * params_units, params_ub * params_units
+	span = np.ptp(rsm_models_batch(scale(rng.rand(1000, len(lb)), lb, ub)), axis=0)
+	def evaluate(P):
+		U = (P * params_units - lb) / (ub - lb)
+		Y = rsm_models_batch(P * params_units)
+		return Y + span * (bend * np.sin(np.pi * U[:,1] * U[:,3])[:,None] + noise * rng.randn(*Y.shape))
+	return evaluate
+#
+if __name__ == '__main__':
+	fit = sequential_design(stand_in(), params_lb, params_ub, seed=0)
+	for n, error in fit.history:
+		print('{0:>4d} designs, LOO error = {1}'.format(n, error))
+	print('{0} of {1} designs evaluated'.format(len(fit.X), max_points))
+	#
+	# Infill designs were added and reduced the error
+	errors = [np.max(error) for n, error in fit.history if error is not None]
+	assert len(fit.X) > n_initial and errors[-1] < errors[0]
+#
+# ********************************************************************************
@@ -0,0 +1,119 @@
+# ********************************************************************************
+#
+#		Optimal Latin Hypercube (LHC) Sampling Plan
+#
+#		Morris-Mitchell search for space-filling LHC sampling plans with vectorised
+#		pairwise distances, parallel restarts and a plan cache on disk.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import os
+import multiprocessing
+import numpy as np
+#
+# ********************************************************************************
+# User inputs
+# ********************************************************************************
+#
+# Plan cache directory (plans are stored as
+# lhc_{n_points}_{n_dims}_{seed}_{restarts}_{iterations}_{q}_{p}.npy)
+cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lhc_cache')
+#
+# ********************************************************************************
+# Space-filling criterion
+# ********************************************************************************
+#
+# Pairwise distances to the power p (n, n) of the rows of X (rectilinear for
+# p=1, squared Euclidean for p=2), infinite on the diagonal
+def pairwise_dist(X, p=1):
+	D = np.zeros((len(X), len(X)))
+	for c in range(X.shape[1]):
+		D += np.abs(X[:,c,None] - X[None,:,c])**p
+	D[np.diag_indices(len(X))] = np.inf
+	return D
+#
+# Morris-Mitchell criterion phi_q (smaller is more space-filling)
+def mm_phi(X, q=10, p=1):
+	D = pairwise_dist(X, p)
+	return (np.sum(np.triu(D ** (-float(q) / p), 1)))**(1.0 / q)
+#
+# ********************************************************************************
+# Search
+# ********************************************************************************
+#
+# Random LHC of n points in k dimensions (cell centres of the unit cube)
+def random_lhc(n, k, rng):
+	return (np.argsort(rng.rand(n, k), axis=0) + 0.5) / n
+#
+# Local search from one random LHC: swaps of two entries in one column are
+# accepted when they reduce the sum of d^-q. A swap only moves two rows, so the
+# distance matrix and criterion are updated in O(n) per proposal.
+def _search(job):
+	n, k, seed, iterations, q, p = job
+	rng = np.random.RandomState(seed)
+	X = random_lhc(n, k, rng)
+	D = pairwise_dist(X, p)
+	T = D ** (-float(q) / p)
+	e = -float(q) / p
+	cols = rng.randint(k, size=iterations)
+	rows = rng.randint(n, size=(iterations, 2))
+	for c, (i, j) in zip(cols, rows):
+		if i == j:
+			continue
+		xc = X[:,c]
+		# Distances of rows i and j to all rows after the swap (entry i-j unchanged)
+		Di = D[i] - np.abs(xc[i] - xc)**p + np.abs(xc[j] - xc)**p
+		Dj = D[j] - np.abs(xc[j] - xc)**p + np.abs(xc[i] - xc)**p
+		Di[i] = Di[j] = Dj[i] = Dj[j] = np.inf
+		Ti = Di**e
+		Tj = Dj**e
+		delta = np.sum(Ti) + np.sum(Tj) - np.sum(T[i]) - np.sum(T[j]) + 2 * T[i,j]
+		if delta >= 0:
+			continue
+		xc[i], xc[j] = xc[j], xc[i]
+		dij, tij = D[i,j], T[i,j]
+		D[i], D[j], D[:,i], D[:,j] = Di, Dj, Di, Dj
+		T[i], T[j], T[:,i], T[:,j] = Ti, Tj, Ti, Tj
+		D[i,j] = D[j,i] = dij
+		T[i,j] = T[j,i] = tij
+	return X
+#
+# Optimal LHC of n_points in n_dims (unit cube): best of several restarts of the
+# swap search by phi_q, run on a process pool (processes=1 runs in this
+# process). Plans with a seed are cached on disk, keyed by the search settings,
+# and reloaded.
+def optimal_lhc(n_points, n_dims, seed=0, restarts=4, iterations=None, q=10, p=1,
+processes=1, cache=True):
+	if iterations is None:
+		iterations = min(40 * n_points * n_dims, 20000)
+	path = os.path.join(cache_dir, 'lhc_{0}_{1}_{2}_{3}_{4}_{5:g}_{6:g}.npy'.format(n_points, n_dims,
+	seed, restarts, iterations, q, p))
+	if cache and seed is not None and os.path.exists(path):
+		return np.load(path)
+	rng = np.random.RandomState(seed)
+	jobs = [(n_points, n_dims, s, iterations, q, p) for s in rng.randint(2**31 - 1, size=restarts)]
+	if processes == 1:
+		plans = [_search(job) for job in jobs]
+	else:
+		pool = multiprocessing.Pool(processes)
+		try:
+			plans = pool.map(_search, jobs)
+		finally:
+			pool.close()
+			pool.join()
+	plan = min(plans, key=lambda X: mm_phi(X, q, p))
+	if cache and seed is not None:
+		if not os.path.exists(cache_dir):
+			os.makedirs(cache_dir)
+		np.save(path, plan)
+	return plan
+#
+# Plan scaled to the bounds lb, ub
+def scale(plan, lb, ub):
+	lb = np.asarray(lb, dtype=float)
+	return lb + plan * (np.asarray(ub, dtype=float) - lb)
+#
+# ********************************************************************************
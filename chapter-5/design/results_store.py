@@ -0,0 +1,182 @@
+# ********************************************************************************
+#
+#		Campaign Results Store
+#
+#		SQLite (WAL) table of the inputs, responses, stage timings and status of
+#		each design, safe for concurrent writers, with NumPy structured array and
+#		npz exports for surrogate fitting.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import os
+import time
+import sqlite3
+import tempfile
+import numpy as np
+#
+# ********************************************************************************
+# Columns
+# ********************************************************************************
+#
+# Inputs (ar, w, t, l in m), responses (as in rsm.dat and the output_*.txt
+# files), stage run times (s) and stages reused from the run cache. A design
+# with every stage reused is stored as done.
+inputs = ['ar', 'w', 't', 'l']
+responses = ['csa', 'fs', 'sar', 'rcp']
+stages = ['geometry', 'preprocess', 'solve', 'post']
+#
+columns = [('id', 'INTEGER PRIMARY KEY AUTOINCREMENT'), ('key', 'TEXT UNIQUE')] + \
+	[(name, 'REAL') for name in inputs + responses] + \
+	[(name + '_s', 'REAL') for name in stages] + \
+	[('cached', 'INTEGER'), ('status', 'TEXT'), ('dir', 'TEXT'), ('created', 'REAL')]
+#
+# Structured array type of load_arrays (missing values as NaN)
+dtype = np.dtype([('id', 'i8')] + [(name, 'f8') for name in inputs + responses] +
+	[(name + '_s', 'f8') for name in stages] + [('cached', 'f8'), ('status', 'U8'), ('created', 'f8')])
+#
+# ********************************************************************************
+# Post-processing outputs
+# ********************************************************************************
+#
+# Responses read from the output_{response}.txt files of a design directory
+# (NaN where missing)
+def collect_outputs(folder):
+	values = {}
+	for name in responses:
+		try:
+			with open(os.path.join(folder, 'output_{0}.txt'.format(name)), 'r') as paramsFile:
+				values[name] = float(paramsFile.read().strip())
+		except (IOError, OSError, ValueError):
+			values[name] = float('nan')
+	return values
+#
+# Inputs in rsm.dat units (ar, w, t, l in um) and responses of the rows of a
+# structured array with all responses
+def design_arrays(data):
+	X = np.column_stack([data[name] for name in inputs]) * [1.0, 1e6, 1e6, 1e6]
+	Y = np.column_stack([data[name] for name in responses])
+	ok = ~np.any(np.isnan(Y), axis=1)
+	return X[ok].reshape(-1, len(inputs)), Y[ok].reshape(-1, len(responses))
+#
+# Rename src to dst, replacing dst (os.replace is Python 3 only, and os.rename
+# does not replace an existing file on Windows)
+def replace_file(src, dst):
+	if hasattr(os, 'replace'):
+		os.replace(src, dst)
+		return
+	if os.name == 'nt' and os.path.exists(dst):
+		os.remove(dst)
+	os.rename(src, dst)
+#
+# Write an array to path through a temporary file in the same directory
+def save_snapshot(path, data):
+	handle, temp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+	try:
+		with os.fdopen(handle, 'wb') as snapshotFile:
+			np.save(snapshotFile, data)
+		replace_file(temp, path)
+	except Exception:
+		if os.path.exists(temp):
+			os.remove(temp)
+		raise
+#
+# ********************************************************************************
+# Store
+# ********************************************************************************
+#
+# Each call opens its own connection, so one store may be shared by the threads
+# of the campaign scheduler and several processes may write to the same file
+# (WAL journal, writers wait up to timeout seconds for the lock).
+class ResultsStore(object):
+	def __init__(self, path, timeout=60.0):
+		self.path = path
+		self.timeout = timeout
+		con = self._connect()
+		try:
+			con.execute('PRAGMA journal_mode=WAL')
+			con.execute('CREATE TABLE IF NOT EXISTS results ({0})'.format(
+			', '.join(name + ' ' + kind for name, kind in columns)))
+			existing = [row[1] for row in con.execute('PRAGMA table_info(results)')]
+			for name, kind in columns:
+				if name not in existing:
+					con.execute('ALTER TABLE results ADD COLUMN {0} {1}'.format(name, kind))
+			con.commit()
+		finally:
+			con.close()
+	#
+	def _connect(self):
+		return sqlite3.connect(self.path, timeout=self.timeout)
+	#
+	# Insert (or replace, for a repeated key) one design
+	def add(self, params, values=None, status='done', timings=None, folder=None, key=None, cached=0):
+		row = dict(zip(inputs, [float(v) for v in params]))
+		row.update(values or {})
+		for stage, seconds in (timings or []):
+			row[stage + '_s'] = row.get(stage + '_s', 0.0) + seconds
+		row.update({'key':key, 'cached':cached, 'status':status, 'dir':folder, 'created':time.time()})
+		names = [name for name, kind in columns[1:] if name in row]
+		con = self._connect()
+		try:
+			with con:
+				con.execute('INSERT OR REPLACE INTO results ({0}) VALUES ({1})'.format(
+				', '.join(names), ', '.join('?' * len(names))), [row[name] for name in names])
+		finally:
+			con.close()
+	#
+	# Add a result of the campaign scheduler (usable as its callback), with the
+	# responses collected from the design directory. A design served entirely
+	# from the run cache ('cached') is done, with its cached stages recorded.
+	def add_result(self, result):
+		key = os.path.basename(result['dir'])
+		status = 'done' if result['status'] == 'cached' else result['status']
+		self.add(result['params'], collect_outputs(result['dir']), status,
+		result['timings'], result['dir'], key, result.get('cached', 0))
+	#
+	# Rows with id above last_id as a structured array
+	def _fetch(self, con, last_id=0):
+		rows = con.execute('SELECT {0} FROM results WHERE id > ? ORDER BY id'.format(
+		', '.join(dtype.names)), (last_id,)).fetchall()
+		return np.array(rows, dtype=dtype)
+	#
+	# All rows (or those with the given status) as a structured array. A snapshot
+	# of the table is kept in {path}.npy: rows added since it was written are
+	# appended, and it is only rebuilt after rows are replaced (ids are never
+	# reused, and rows are never updated in place). The snapshot is written to a
+	# temporary file and renamed, so concurrent readers never see it part written.
+	def load_arrays(self, status=None):
+		snapshot = self.path + '.npy'
+		con = self._connect()
+		try:
+			count, last_id = con.execute('SELECT COUNT(*), MAX(id) FROM results').fetchone()
+			if count == 0:
+				data = np.empty(0, dtype=dtype)
+			else:
+				data = np.load(snapshot) if os.path.exists(snapshot) else np.empty(0, dtype=dtype)
+				if data.dtype != dtype:
+					data = np.empty(0, dtype=dtype)
+				if len(data) != count or data['id'][-1] != last_id:
+					if len(data) and data['id'][-1] <= last_id:
+						data = np.concatenate((data, self._fetch(con, int(data['id'][-1]))))
+					if len(data) != count:
+						data = self._fetch(con)
+					save_snapshot(snapshot, data)
+		finally:
+			con.close()
+		if status is not None:
+			data = data[data['status'] == status]
+		return data
+	#
+	# Inputs in rsm.dat units (ar, w, t, l in um) and responses of the completed
+	# designs, for fitting the response surface models
+	def load_xy(self, status='done'):
+		return design_arrays(self.load_arrays(status))
+	#
+	# Column arrays in a compressed npz file (loaded with np.load)
+	def export_npz(self, path, status=None):
+		data = self.load_arrays(status)
+		np.savez_compressed(path, **dict((name, data[name]) for name in data.dtype.names))
+#
+# ********************************************************************************
@@ -0,0 +1,91 @@
+# ********************************************************************************
+#
+#		Run Directory Cache
+#
+#		Keys the working directory of each design by a hash of its parameters and
+#		of the analysis scripts and material model, and records completed stages so
+#		that repeated designs are reused and interrupted campaigns resume.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import os
+import hashlib
+import threading
+#
+# ********************************************************************************
+# Hashing
+# ********************************************************************************
+#
+# Files of a directory tree (relative paths, sorted), or the file itself
+def source_files(path):
+	if os.path.isfile(path):
+		return [(os.path.basename(path), path)]
+	files = []
+	for folder, dirs, names in os.walk(path):
+		dirs.sort()
+		for name in sorted(names):
+			full = os.path.join(folder, name)
+			files.append((os.path.relpath(full, path).replace(os.sep, '/'), full))
+	return files
+#
+# SHA-1 of the names and contents of the source files and directories
+def source_digest(sources):
+	h = hashlib.sha1()
+	for source in sources:
+		for name, full in source_files(source):
+			h.update(name.encode('utf-8') + b'\0')
+			with open(full, 'rb') as sourceFile:
+				h.update(hashlib.sha1(sourceFile.read()).digest())
+	return h.hexdigest()
+#
+# ********************************************************************************
+# Cache
+# ********************************************************************************
+#
+# Design directories root/DOE-{key}, where key hashes (ar, w, t, l) to 9
+# significant figures with the sources (scripts directory, material file, ...)
+# and any extra settings (e.g. the analysis commands). A marker file is written
+# as each stage of a design completes.
+class RunCache(object):
+	def __init__(self, root, sources, extra=''):
+		self.root = root
+		self.source_hash = source_digest(sources)
+		self.extra = str(extra)
+		self._locks = {}
+		self._locks_lock = threading.Lock()
+	#
+	def key(self, params):
+		text = ','.join('{0:.9g}'.format(float(v)) for v in params)
+		text += '|' + self.source_hash + '|' + self.extra
+		return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+	#
+	def path(self, key):
+		return os.path.join(self.root, 'DOE-{0}'.format(key))
+	#
+	# Lock held while a design runs, so repeats of a design in one campaign wait for
+	# the first and are then served from its directory
+	def lock(self, key):
+		with self._locks_lock:
+			return self._locks.setdefault(key, threading.Lock())
+	#
+	def _marker(self, folder, step, stage):
+		return os.path.join(folder, '.done-{0:02d}-{1}'.format(step, stage))
+	#
+	# True if stage number step has completed in folder
+	def done(self, folder, step, stage):
+		return os.path.exists(self._marker(folder, step, stage))
+	#
+	# Record stage number step as complete (with its run time in seconds)
+	def mark(self, folder, step, stage, seconds):
+		with open(self._marker(folder, step, stage), 'w') as markerFile:
+			markerFile.write('{0:.3f}'.format(seconds))
+	#
+	# Run time of a completed stage
+	def seconds(self, folder, step, stage):
+		with open(self._marker(folder, step, stage), 'r') as markerFile:
+			return float(markerFile.read())
+#
+# ********************************************************************************
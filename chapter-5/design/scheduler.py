@@ -0,0 +1,188 @@
+# ********************************************************************************
+#
+#		Campaign Scheduler
+#
+#		Builds the working directory of each design of a sampling plan and runs the
+#		SolidWorks, Abaqus pre-processing, solve and post-processing stages on a
+#		bounded pool of workers, with a concurrency limit per stage.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import os
+import sys
+import glob
+import shutil
+import subprocess
+import threading
+import time
+import traceback
+from multiprocessing.pool import ThreadPool
+from distutils.dir_util import copy_tree
+#
+# ********************************************************************************
+# User inputs
+# ********************************************************************************
+#
+# Analysis steps of each design in order (stage, command). Commands run in the
+# design directory and may contain {dir}, {i}, {ar}, {w}, {t} and {l}.
+abaqus_steps = [
+	('preprocess', ['abaqus', 'cae', 'noGUI=csa_in.py']),
+	('solve', ['abaqus', 'job=RECOIL', 'interactive']),
+	('post', ['abaqus', 'python', 'odb_extract.py', 'recoil']),
+	('preprocess', ['abaqus', 'cae', 'noGUI=rcp_in.py']),
+	('solve', ['abaqus', 'job=STIFFNESS', 'interactive']),
+	('post', ['abaqus', 'python', 'odb_extract.py', 'stiffness']),
+	('post', ['abaqus', 'python', 'sar_out.py'])]
+#
+# SolidWorks geometry command (run in the geometry directory)
+sldwrks_command = ['cmd', '/c', 'os_command_sldwrks.bat']
+#
+# Concurrent runs allowed per stage (SolidWorks licences, Abaqus tokens). The
+# geometry directory is shared, so geometry is always built one design at a time.
+stage_limits = {'geometry':1, 'preprocess':2, 'solve':2, 'post':4}
+#
+# Local stand-in for the SolidWorks and Abaqus commands (for testing the
+# scheduler without licences)
+stub_command = [sys.executable, '-c', 'import sys, time; time.sleep(0.1); print(sys.argv[1:])']
+#
+# ********************************************************************************
+# Scheduler
+# ********************************************************************************
+#
+# Campaign of designs (ar, w, t, l) run in root/DOE-{i}, or in the keyed
+# directories of a RunCache (completed stages are then skipped, so repeated
+# designs are reused and interrupted campaigns resume). The geometry directory
+# holds the SolidWorks macro and its parameter files, so the geometry stage is
+# run one design at a time; everything else only touches the design directory.
+class Campaign(object):
+	def __init__(self, root, geometry_dir, material_file, scripts_dir,
+	steps=abaqus_steps, sldwrks=sldwrks_command, limits=stage_limits, cache=None):
+		self.root = root
+		self.cache = cache
+		self.geometry_dir = geometry_dir
+		self.material_file = material_file
+		self.scripts_dir = scripts_dir
+		self.steps = steps
+		self.sldwrks = sldwrks
+		self.limits = dict(limits)
+		self.limits['geometry'] = 1
+		for stage, argv in steps:
+			self.limits.setdefault(stage, 1)
+		self._locks = dict((stage, threading.BoundedSemaphore(n)) for stage, n in self.limits.items())
+	#
+	def design_dir(self, i, params):
+		if self.cache is not None:
+			return self.cache.path(self.cache.key(params))
+		return os.path.join(self.root, 'DOE-{0}'.format(i+1))
+	#
+	# Run one command of a stage in cwd (output appended to {stage}.log in log_dir)
+	def _call(self, stage, argv, cwd, fields, log_dir):
+		argv = [arg.format(**fields) for arg in argv]
+		with open(os.path.join(log_dir, '{0}.log'.format(stage)), 'a') as logFile:
+			logFile.write(' '.join(argv) + '\n')
+			logFile.flush()
+			code = subprocess.call(argv, cwd=cwd, stdout=logFile, stderr=subprocess.STDOUT)
+		if code != 0:
+			raise RuntimeError('{0} failed ({1}): {2}'.format(stage, code, ' '.join(argv)))
+	#
+	# Run one command of a stage in the design directory within the stage limit
+	def run_command(self, stage, argv, fields):
+		with self._locks[stage]:
+			self._call(stage, argv, fields['dir'], fields, fields['dir'])
+	#
+	# Geometry (SolidWorks) and material of design i in its directory
+	def build(self, i, params, fields):
+		ar, w, t, l = params
+		folder = fields['dir']
+		if not os.path.exists(folder):
+			os.makedirs(folder)
+		#
+		# SolidWorks
+		with self._locks['geometry']:
+			for path in glob.glob(os.path.join(self.geometry_dir, '*.SAT')):
+				os.remove(path)
+			for name, value in (('w', w), ('t', t), ('l', l)):
+				with open(os.path.join(self.geometry_dir, 'geometry_params_{0}.txt'.format(name)), 'w') as paramsFile:
+					paramsFile.write(str(value))
+				shutil.copy2(os.path.join(self.geometry_dir, 'geometry_params_{0}.txt'.format(name)), folder)
+			self._call('geometry', self.sldwrks, self.geometry_dir, fields, folder)
+			shutil.move(os.path.join(self.geometry_dir, 'Stent.SAT'), os.path.join(folder, 'Stent.SAT'))
+		#
+		# Constitutive model: PLLA.py and plla_lib.py are copied unchanged and read
+		# the aspect ratio of the design from material_params_ar.txt
+		with open(os.path.join(folder, 'material_params_ar.txt'), 'w') as paramsFile:
+			paramsFile.write(repr(float(ar)))
+		shutil.copy2(self.material_file, folder)
+		shutil.copy2(os.path.join(os.path.dirname(self.material_file), 'plla_lib.py'), folder)
+		#
+		# Abaqus
+		copy_tree(self.scripts_dir, folder)
+	#
+	# Geometry then the analysis steps, skipping stages completed in the cache
+	def _run_stages(self, i, params, fields, result):
+		for n, (stage, argv) in enumerate([('geometry', None)] + list(self.steps)):
+			if self.cache is not None and self.cache.done(fields['dir'], n, stage):
+				result['timings'].append((stage, self.cache.seconds(fields['dir'], n, stage)))
+				result['cached'] += 1
+				continue
+			start = time.time()
+			if argv is None:
+				self.build(i, params, fields)
+			else:
+				self.run_command(stage, argv, fields)
+			result['timings'].append((stage, time.time() - start))
+			if self.cache is not None:
+				self.cache.mark(fields['dir'], n, stage, time.time() - start)
+	#
+	# Build and analyse design i, returning its status ('done', 'cached' or
+	# 'failed') and stage timings
+	def run_design(self, i, params):
+		ar, w, t, l = params
+		fields = {'dir':self.design_dir(i, params), 'i':i+1, 'ar':ar, 'w':w, 't':t, 'l':l}
+		result = {'i':i, 'params':params, 'dir':fields['dir'], 'status':'done', 'timings':[],
+		'cached':0}
+		try:
+			if self.cache is None:
+				self._run_stages(i, params, fields, result)
+			else:
+				with self.cache.lock(self.cache.key(params)):
+					self._run_stages(i, params, fields, result)
+			if result['cached'] == len(self.steps) + 1:
+				result['status'] = 'cached'
+		except Exception as e:
+			result['status'] = 'failed'
+			result['error'] = str(e)
+		return result
+	#
+	# callback(result) on the pool's result handler thread. An exception in it
+	# (such as from the results store) would stop later results being handled, so
+	# it is reported on stderr and the design marked failed.
+	def _report(self, callback, result):
+		try:
+			callback(result)
+		except Exception as e:
+			result['status'] = 'failed'
+			result['error'] = 'callback: {0}'.format(e)
+			sys.stderr.write('{0}: callback failed\n{1}'.format(result['dir'], traceback.format_exc()))
+	#
+	# Run all designs (rows of design_matrix) on a pool of workers (default enough
+	# to keep every stage busy), calling callback(result) as each design finishes.
+	# Results are returned in design order.
+	def run(self, design_matrix, workers=None, callback=None):
+		if workers is None:
+			workers = sum(self.limits.values())
+		report = None if callback is None else lambda result: self._report(callback, result)
+		pool = ThreadPool(workers)
+		try:
+			jobs = [pool.apply_async(self.run_design, (i, list(params)), callback=report)
+			for i, params in enumerate(design_matrix)]
+			results = [job.get() for job in jobs]
+		finally:
+			pool.close()
+			pool.join()
+		return results
+#
+# ********************************************************************************
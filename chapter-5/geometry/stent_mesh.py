@@ -0,0 +1,277 @@
+# ********************************************************************************
+#
+#		Multilink Stent Hex Mesher
+#
+#		Builds the ring and link pattern of a Multilink stent from the strut width,
+#		thickness and length (w, t, l) as a structured hexahedral mesh in
+#		cylindrical coordinates (axis x), with the node sets and surfaces of
+#		csa_in.py, without the SolidWorks geometry or CAE meshing stages.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import os
+import sys
+import time
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'abaqus'))
+#
+# ********************************************************************************
+# User inputs
+# ********************************************************************************
+#
+# Stent length and outer radius (mm), rings, crowns (peaks) per ring and links
+# between neighbouring rings
+length = 5.0
+outerRadius = 0.9
+n_rings = 3
+n_crowns = 6
+n_links = 3
+#
+# Inner radius of the crowns (mm)
+crownRadius = 0.05
+#
+# Element size (mm, the CAE seed size) along the struts and links, and elements
+# across the strut width, through the thickness and around each side of a crown
+# outside the link width. The last three are fixed so the mesh, and the areas,
+# vary smoothly with w, t and l (n_width is even so each crown apex is a node).
+size = 0.035
+n_width = 4
+n_thick = 4
+n_crown = 4
+elemType = 'C3D8R'
+#
+# Design parameters (w, t, l) are given in m
+units = 1000.0
+#
+# Face node order of C3D8 elements (S1 to S6). Nodes 1-4 are on the inner and
+# 5-8 on the outer radius, so S1 is the inner and S2 the outer face.
+face_nodes = np.array([[0, 1, 2, 3], [4, 7, 6, 5], [0, 4, 5, 1],
+[1, 5, 6, 2], [2, 6, 7, 3], [3, 7, 4, 0]])
+#
+# ********************************************************************************
+# Pattern
+# ********************************************************************************
+#
+# Unit vectors at angles a (from x towards s) in the unrolled (x, s) plane
+def direction(a):
+	return np.stack((np.cos(a), np.sin(a)), axis=-1)
+#
+# Centreline of a ring with crowns pitch apart in the unrolled (x, s) plane.
+# The ring zig-zags between crown apexes at x = -/+ h/2, h = sqrt(l^2 - pitch^2)
+# as for struts of length l between sharp crowns, with straight struts tangent to
+# crown arcs of centreline radius crownRadius + w/2. Returns the stations (n, 2)
+# of the closed centreline, the unit vector (n, 2) across the strut at each
+# (towards the outside of the peaks and the inside of the valleys), the first
+# station of each crown and h. The n_width elements at each crown apex span the
+# strut width w on its outer edge, where a link is joined.
+def ring_path(w, l, pitch, size=size, crowns=n_crowns):
+	if l <= pitch:
+		raise ValueError('strut length {0} shorter than the crown pitch {1}'.format(l, pitch))
+	h = np.sqrt(l ** 2 - pitch ** 2)
+	rc = crownRadius + 0.5 * w
+	a = 0.5 * h - rc
+	d = np.sqrt(4 * a * a + pitch ** 2)
+	if a <= 0 or d <= 2 * rc:
+		raise ValueError('crowns of radius {0} do not fit a ring of height {1}'.format(rc, h))
+	#
+	# Crown centres, and the normals n of the struts from crown j to j+1, which
+	# touch crown j at rc * n and crown j+1 at -rc * n
+	j = np.arange(2 * crowns)
+	sign = np.where(j % 2 == 0, 1.0, -1.0)
+	centre = np.column_stack((a * sign, j * pitch))
+	e = np.column_stack((-2 * a * sign, np.full(len(j), pitch))) / d
+	n = 2 * rc / d * e + np.sqrt(1 - (2 * rc / d) ** 2) * sign[:,None] * np.column_stack((e[:,1], -e[:,0]))
+	start = centre + rc * n
+	end = np.column_stack((-a * sign, (j + 1) * pitch)) - rc * n
+	n_strut = 2 * int(np.ceil(0.5 * np.hypot(*(end - start)[0]) / size))
+	#
+	# Crown arcs from apex - sweep to apex + sweep, with the link width (half
+	# angle phi on the outer edge) in the middle
+	apex = np.where(sign > 0, 0.0, np.pi)
+	sweep = np.angle(np.exp(1j * (np.arctan2(n[:,1], n[:,0]) - apex)))
+	phi = np.arcsin(0.5 * w / (rc + 0.5 * w)) / np.fabs(sweep[0])
+	tau = np.concatenate((np.linspace(-1.0, -phi, n_crown + 1)[:-1], np.linspace(-phi, phi, n_width + 1)[:-1],
+	np.linspace(phi, 1.0, n_crown + 1)[:-1]))
+	radial = direction(apex[:,None] + tau * sweep[:,None])
+	frac = np.arange(n_strut)[None,:,None] / float(n_strut)
+	stations = np.concatenate((centre[:,None] + rc * radial, start[:,None] + frac * (end - start)[:,None]), axis=1)
+	across = np.concatenate((sign[:,None,None] * radial, np.repeat(sign[:,None,None] * n[:,None], n_strut, axis=1)), axis=1)
+	return stations.reshape(-1, 2), across.reshape(-1, 2), j * stations.shape[1], h
+#
+# Hexahedra of a structured block of node labels (nu+1, nv+1, nk+1), with their
+# (u, v, k) cell indices: 1-2 along u, 1-4 along v, 1-5 along k
+def hexes(grid):
+	u, v, k = [i.ravel() for i in np.meshgrid(*[np.arange(m - 1) for m in grid.shape], indexing='ij')]
+	connectivity = np.column_stack([grid[u + du, v + dv, k + dk] for dk in (0, 1)
+	for du, dv in ((0, 0), (1, 0), (1, 1), (0, 1))])
+	return connectivity, u, v, k
+#
+# ********************************************************************************
+# Mesh
+# ********************************************************************************
+#
+# Body-fitted hex mesh of the stent of strut width w, thickness t and strut
+# length l (mm): the strut cross-section swept along the centreline of each ring,
+# with straight links joined to the outer edges of facing crowns, mapped to the
+# cylinder (the pattern is cut radially, as by the laser). Returns the stent of
+# inp_writer.py (node labels and coordinates, element labels and connectivity,
+# node sets and INNER, OUTER and TOTAL surfaces as element and face numbers).
+def stent_mesh(w, t, l, size=size, radius=outerRadius, length=length, elemType=elemType,
+	rings=n_rings, crowns=n_crowns, links=n_links):
+	r_in = radius - t
+	r_mid = radius - 0.5 * t
+	pitch = np.pi * r_mid / crowns
+	stations, across, first, h = ring_path(w, l, pitch, size, crowns)
+	centres = np.linspace(-0.5 * (length - h - w), 0.5 * (length - h - w), rings)
+	gap = centres[1] - centres[0] - h - w if rings > 1 else 0.0
+	if rings > 1 and gap < w:
+		raise ValueError('rings of height {0} overlap in a length of {1}'.format(h + w, length))
+	n_link = max(2, int(np.ceil(gap / size)))
+	#
+	# Ring k is turned k crown pitches, so the valleys of ring k+1 face the peaks
+	# of ring k. Links join peaks 2m of ring k (n_width + 1 stations on the outer
+	# edge, from a) to the valleys 2m-1 of ring k+1 at the same angle (from b).
+	plane = stations[:,None] + np.linspace(-0.5 * w, 0.5 * w, n_width + 1)[:,None] * across[:,None]
+	k, m = np.meshgrid(np.arange(rings - 1), np.arange(links) * crowns // links, indexing='ij')
+	k, m = k.ravel(), m.ravel()
+	peak = 2 * ((m + k) % crowns)
+	a = first[peak] + n_crown
+	b = first[(peak - 1) % (2 * crowns)] + n_crown
+	span = np.arange(n_width + 1)
+	xa = plane[a[:,None] + span, n_width, 0] + centres[k][:,None]
+	xb = plane[b[:,None] + span, 0, 0] + centres[k + 1][:,None]
+	sa = plane[a[:,None] + span, n_width, 1] + k[:,None] * pitch
+	frac = np.arange(1, n_link)[None,:,None] / float(n_link)
+	planes = [plane + [centres[i], i * pitch] for i in range(rings)] + \
+	[np.stack(np.broadcast_arrays(xa[:,None] + frac * (xb - xa)[:,None], sa[:,None]), axis=-1).reshape(-1, n_width + 1, 2)]
+	#
+	# Nodes (station, across the width, through the thickness)
+	planes = np.concatenate(planes)
+	grid = np.arange(1, planes.size // 2 * (n_thick + 1) + 1).reshape(planes.shape[:2] + (n_thick + 1,))
+	layer = np.broadcast_to(np.arange(n_thick + 1), grid.shape).ravel()
+	x = np.repeat(planes[...,0].ravel(), n_thick + 1)
+	theta = np.repeat(planes[...,1].ravel(), n_thick + 1) / r_mid
+	r = r_in + layer * t / n_thick
+	coords = np.column_stack((x, r * np.cos(theta), r * np.sin(theta)))
+	nodes = grid.ravel()
+	#
+	# Blocks: the rings (closed along the centreline) and the links, each with
+	# the cells on its v = 0 and v = n_width - 1 sides joined to a link
+	n = len(stations)
+	ring = [grid[i * n:(i + 1) * n] for i in range(rings)]
+	interior = grid[rings * n:].reshape(len(k), n_link - 1, n_width + 1, n_thick + 1)
+	joined = np.zeros((rings, 2, n), dtype=bool)
+	blocks = [(np.concatenate((ring[i], ring[i][:1])), joined[i]) for i in range(rings)]
+	for q in range(len(k)):
+		joined[k[q] + 1, 0, b[q]:b[q] + n_width] = True
+		joined[k[q], 1, a[q]:a[q] + n_width] = True
+		blocks.append((np.concatenate((ring[k[q]][a[q] + span, n_width][None], interior[q],
+		ring[k[q] + 1][b[q] + span, 0][None])), np.zeros((2, n_link), dtype=bool)))
+	#
+	# Elements, ordered for a positive volume (1-2-3-4 reversed where a block is
+	# left-handed, which turns its v sides from faces S3 and S5 to S6 and S4)
+	connectivity, surfaces = [], []
+	for block, side in blocks:
+		conn, u, v, ck = hexes(block)
+		x0 = coords[conn[0] - 1]
+		flip = np.dot(np.cross(x0[1] - x0[0], x0[3] - x0[0]), x0[4] - x0[0]) < 0
+		if flip:
+			conn = conn[:,[0, 3, 2, 1, 4, 7, 6, 5]]
+		labels = np.arange(len(conn)) + sum(len(c) for c in connectivity) + 1
+		free = [(ck == 0, 1), (ck == n_thick - 1, 2), ((v == 0) & ~side[0][u], 6 if flip else 3),
+		((v == n_width - 1) & ~side[1][u], 4 if flip else 5)]
+		surfaces.append([(labels[f], np.full(f.sum(), face, dtype=int)) for f, face in free])
+		connectivity.append(conn)
+	connectivity = np.concatenate(connectivity)
+	elements = np.arange(1, len(connectivity) + 1)
+	def surface(sides):
+		return tuple(np.concatenate([s[i][j] for s in surfaces for i in sides]) for j in (0, 1))
+	#
+	# Node sets (planar end nodes: three outer crown apexes at each end, centre
+	# nodes: three inner nodes on the mid plane, nearest 0, 120 and 240 degrees)
+	theta = np.arctan2(coords[:,2], coords[:,1])
+	def nearest(mask, angles, x0):
+		gap = r_mid * np.angle(np.exp(1j * (theta[mask][:,None] - angles)))
+		return nodes[mask][np.argmin(np.hypot(gap, coords[mask,0][:,None] - x0), axis=0)]
+	targets = np.arange(3) * 2 * np.pi / 3
+	tol = 1e-6 * length
+	left = coords[:,0] > 0.5 * length - tol
+	right = coords[:,0] < tol - 0.5 * length
+	mid = (layer == 0) & (np.fabs(coords[:,0]) < np.fabs(coords[layer == 0,0]).min() + tol)
+	nsets = {'ALL NODES':nodes,
+	'INNER NODES':nodes[layer == 0],
+	'END NODES L':nodes[left],
+	'END NODES R':nodes[right],
+	'END NODES L PLANAR':nearest(left & (layer == n_thick), targets, 0.5 * length),
+	'END NODES R PLANAR':nearest(right & (layer == n_thick), targets, -0.5 * length),
+	'CENTRE NODES':nearest(mid, targets, 0.0)}
+	return {'nodes':nodes, 'coords':coords, 'elements':elements, 'connectivity':connectivity,
+	'type':elemType, 'nsets':nsets, 'surfaces':{'INNER':surface([0]), 'OUTER':surface([1]),
+	'TOTAL':surface([0, 1, 2, 3])}}
+#
+# Area of a surface (elements, faces) of a stent, each face taken as half the
+# cross product of its diagonals
+def surface_area(stent, name):
+	elements, faces = stent['surfaces'][name]
+	index = np.searchsorted(stent['elements'], elements)
+	corners = stent['connectivity'][index[:,None], face_nodes[faces - 1]]
+	x = stent['coords'][np.searchsorted(stent['nodes'], corners)]
+	return 0.5 * np.sum(np.linalg.norm(np.cross(x[:,2] - x[:,0], x[:,3] - x[:,1]), axis=1))
+#
+# Node sets and scalars of model_meta.npz
+def stent_meta(stent):
+	from model_meta import node_sets
+	sets = dict((key, stent['nsets'][name]) for key, name in node_sets)
+	scalars = {'surfaceAreaOuter':surface_area(stent, 'OUTER'),
+	'surfaceAreaTotal':surface_area(stent, 'TOTAL')}
+	return sets, scalars
+#
+# ********************************************************************************
+# Model
+# ********************************************************************************
+#
+def read_value(folder, name):
+	paramsFile = open(os.path.join(folder, name), 'r')
+	value = float(paramsFile.read())
+	paramsFile.close()
+	return value
+#
+# RECOIL.inp and model_meta.npz of the design in folder, from its
+# geometry_params_{w,t,l}.txt (m) and material_params_ar.txt files
+def build_model(folder, fil=False):
+	from model_meta import meta_file, write_meta
+	from inp_writer import write_recoil_inp
+	w, t, l = [read_value(folder, 'geometry_params_{0}.txt'.format(name)) * units for name in 'wtl']
+	ar = read_value(folder, 'material_params_ar.txt')
+	stent = stent_mesh(w, t, l)
+	sets, scalars = stent_meta(stent)
+	write_meta(sets, scalars, os.path.join(folder, meta_file))
+	write_recoil_inp(os.path.join(folder, 'RECOIL.inp'), stent, ar, fil)
+	return stent
+#
+# Usage: python stent_mesh.py [folder] (without a folder, meshes the base design)
+if __name__ == '__main__':
+	if len(sys.argv) > 1:
+		stent = build_model(sys.argv[1])
+	else:
+		start = time.time()
+		stent = stent_mesh(0.15, 0.15, 1.0)
+		print('{0} nodes, {1} elements in {2:.1f} ms'.format(len(stent['nodes']),
+		len(stent['elements']), (time.time() - start) * 1e3))
+		print('outer surface area {0:.4f}, total surface area {1:.4f}'.format(
+		surface_area(stent, 'OUTER'), surface_area(stent, 'TOTAL')))
+		#
+		# The areas vary smoothly with w and l (no steps in the responses)
+		for name, values in (('w', np.linspace(0.10, 0.20, 11)), ('l', np.linspace(0.90, 1.20, 13))):
+			areas = []
+			for value in values:
+				stent = stent_mesh(*[value if key == name else base for key, base in zip('wtl', (0.15, 0.15, 1.0))])
+				areas.append([surface_area(stent, 'OUTER'), surface_area(stent, 'TOTAL')])
+				print('{0} = {1:.3f}: outer {2:.4f}, total {3:.4f}'.format(name, value, *areas[-1]))
+			steps = np.diff(areas, axis=0)
+			assert np.all(steps > 0) and np.all(np.fabs(np.diff(steps, axis=0)) < 0.05 * steps[1:])
+#
+# ********************************************************************************
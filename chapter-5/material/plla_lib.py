@@ -0,0 +1,97 @@
+# ********************************************************************************
+#
+#		PLLA Constitutive Model Library
+#
+#		Orthotropic elastic constants (D1111..D2323), plastic table and stress
+#		ratios of the PLLA model of PLLA.py for arrays of aspect ratios, using the
+#		closed-form inverse of the orthotropic compliance.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import numpy as np
+#
+# ********************************************************************************
+# Coefficients
+# ********************************************************************************
+#
+# Aspect ratios of the circumferential (1 <= ar <= 2.3) and axial (0 < ar < 1)
+# orientations, Poisson's ratio and elongation at break
+ar_max = 2.3
+v1 = 0.35
+v2 = v1
+eb = 0.5
+#
+# Order of the elastic constants in the Abaqus ORTHOTROPIC table
+elastic_names = ['D1111', 'D1122', 'D2222', 'D1133', 'D2233', 'D3333', 'D1212', 'D1313', 'D2323']
+#
+# Aspect ratios as an array, with the modified ratio (>= 1) and orientation
+# (True where circumferential)
+def orientation(ar):
+	ar = np.atleast_1d(np.asarray(ar, dtype=float))
+	if np.any(ar <= 0) or np.any(ar > ar_max):
+		raise ValueError('Check aspect ratio definition')
+	circumferential = ar >= 1
+	return ar, np.where(circumferential, ar, 1 / ar), circumferential
+#
+# Stiffness (n, 3, 3 normal block) of compliances s11..s23 (n,) by the closed-form
+# inverse of a symmetric 3 x 3 matrix
+def inverse3(s11, s22, s33, s12, s13, s23):
+	c11 = s22 * s33 - s23**2
+	c22 = s11 * s33 - s13**2
+	c33 = s11 * s22 - s12**2
+	c12 = s13 * s23 - s12 * s33
+	c13 = s12 * s23 - s13 * s22
+	c23 = s12 * s13 - s11 * s23
+	det = s11 * c11 + s12 * c12 + s13 * c13
+	return c11 / det, c22 / det, c33 / det, c12 / det, c13 / det, c23 / det
+#
+# ********************************************************************************
+# Material constants
+# ********************************************************************************
+#
+# Constants of the PLLA model for aspect ratios ar (scalar or (n,)) as arrays:
+#   elastic (n, 9)      D1111..D2323 (elastic_names order)
+#   plastic (n, 2, 2)   yield and ultimate (true) stress with plastic strain
+#   potential (n, 6)    stress ratios R11, R22, R33, R12, R13, R23
+def plla_constants(ar):
+	ar, ar_mod, circumferential = orientation(ar)
+	out = constants(ar_mod, circumferential)
+	out['ar'] = ar
+	return out
+#
+# Constants of modified aspect ratios ar_mod (n,) in each orientation (n,)
+def constants(ar_mod, circumferential):
+	E1 = 3062 - 555 * ar_mod
+	E2 = 2196 + 618 * ar_mod
+	ys1 = 65 - 11 * ar_mod
+	ys2 = 46 + 10 * ar_mod
+	uts1_true = ys1 * (1 + np.log(1 + eb))
+	G1 = E1 / (2 * (1 + v1))
+	G2 = 1 / (1 / E1 + 1 / E2 + 2 * v2 / E2)
+	#
+	# Compliance: the weaker (E2) direction is 2 (circumferential) or 3 (axial)
+	c = circumferential
+	s22 = np.where(c, 1 / E2, 1 / E1)
+	s33 = np.where(c, 1 / E1, 1 / E2)
+	s12 = np.where(c, -v2 / E2, -v1 / E1)
+	s13 = np.where(c, -v1 / E1, -v2 / E2)
+	s23 = -v2 / E2
+	D11, D22, D33, D12, D13, D23 = inverse3(1 / E1, s22, s33, s12, s13, s23)
+	elastic = np.column_stack((D11, D12, D22, D13, D23, D33, G2,
+	np.where(c, G1, G2), np.where(c, G2, G1)))
+	#
+	plastic = np.empty((len(ar_mod), 2, 2))
+	plastic[:,0,0] = ys1
+	plastic[:,0,1] = 0.0
+	plastic[:,1,0] = uts1_true
+	plastic[:,1,1] = eb - uts1_true / E1
+	#
+	potential = np.ones((len(ar_mod), 6))
+	potential[c,1] = (ys2 / ys1)[c]
+	potential[~c,2] = (ys2 / ys1)[~c]
+	return {'elastic':elastic, 'plastic':plastic, 'potential':potential}
+#
+# ********************************************************************************
@@ -0,0 +1,102 @@
+# ********************************************************************************
+#
+#		Multi-Start Optimisation
+#
+#		Runs local optimisations from a space-filling set of start points inside the
+#		parameter bounds, in parallel, and returns the best and distinct optima.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import multiprocessing
+import numpy as np
+from scipy.optimize import minimize
+#
+# ********************************************************************************
+# Start points
+# ********************************************************************************
+#
+# Maximin Latin hypercube of n_starts points scaled to bounds (best of several
+# random candidate plans)
+def lhs_starts(n_starts, bounds, seed=None, candidates=20):
+	rng = np.random.RandomState(seed)
+	lb, ub = np.array(bounds, dtype=float).T
+	best_plan = None
+	best_dist = -1.0
+	for i in range(candidates):
+		plan = (np.argsort(rng.rand(n_starts, len(lb)), axis=0) + rng.rand(n_starts, len(lb))) / n_starts
+		diff = plan[:,None,:] - plan[None,:,:]
+		dist = np.sum(diff**2, axis=2)
+		dist[np.diag_indices(n_starts)] = np.inf
+		if dist.min() > best_dist:
+			best_plan = plan
+			best_dist = dist.min()
+	return lb + best_plan * (ub - lb)
+#
+# ********************************************************************************
+# Local optimisation
+# ********************************************************************************
+#
+# Single local run (module level so that it can be sent to worker processes)
+def _local_opt(job):
+	fun, x0, kwargs = job
+	return minimize(fun, x0, **kwargs)
+#
+# Remove optima within tol (fraction of the bounds) of a better optimum
+def distinct_optima(results, bounds, tol=1e-3):
+	lb, ub = np.array(bounds, dtype=float).T
+	results = sorted(results, key=lambda r: r.fun)
+	kept = []
+	kept_x = np.empty((0, len(lb)))
+	for r in results:
+		xs = (np.asarray(r.x) - lb) / (ub - lb)
+		if len(kept) and np.min(np.max(np.abs(kept_x - xs), axis=1)) < tol:
+			continue
+		kept.append(r)
+		kept_x = np.vstack((kept_x, xs))
+	return kept
+#
+# ********************************************************************************
+# Multi-start driver
+# ********************************************************************************
+#
+# Runs n_starts local optimisations of fun on a process pool (a shared pool may be
+# passed in; processes=1 runs in this process). fun, jac and the constraint
+# functions must be defined at module level so that they can be pickled. The best
+# result is returned with the distinct local optima in .optima (best first). The
+# default solver tolerance is tight so that starts converging to the same optimum
+# are recognised as duplicates.
+def multi_start(fun, bounds, n_starts=100, x0=None, jac=None, constraints=(),
+method='SLSQP', options=None, pool=None, processes=None, seed=None, tol=1e-3):
+	if options is None:
+		options = {'ftol':1e-9, 'maxiter':500}
+	starts = lhs_starts(n_starts, bounds, seed)
+	if x0 is not None:
+		starts = np.vstack(([x0], starts))
+	kwargs = {'method':method, 'jac':jac, 'bounds':bounds, 'constraints':constraints,
+	'options':options}
+	jobs = [(fun, x, kwargs) for x in starts]
+	if pool is not None:
+		results = pool.map(_local_opt, jobs)
+	elif processes == 1:
+		results = [_local_opt(job) for job in jobs]
+	else:
+		pool = multiprocessing.Pool(processes)
+		try:
+			results = pool.map(_local_opt, jobs)
+		finally:
+			pool.close()
+			pool.join()
+	#
+	# Distinct converged optima (all runs if none converged)
+	converged = [r for r in results if r.success]
+	optima = distinct_optima(converged or results, bounds, tol)
+	best = optima[0]
+	best.optima = optima
+	best.nstarts = len(jobs)
+	best.nfev_total = sum(r.nfev for r in results)
+	return best
+#
+# ********************************************************************************
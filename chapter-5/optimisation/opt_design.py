@@ -10,44 +10,26 @@
 #
 # ********************************************************************************
 #
+import os
+import sys
 import numpy as np
 from scipy.optimize import minimize
+from multi_start import multi_start
+from pareto import nsga2
+from surrogate import coeff, rsm_models, rsm_models_batch, rsm_jacobian, ResponseCache, set_coeff
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rsm'))
+from rsm_fit import read_rsm_data, fit_rsm
 #
 # ********************************************************************************
 # User inputs
 # ********************************************************************************
 #
-# Empirical model coefficients
-coeff = [[-2.614,4.488e+01,-1.115e+00,-2.525e+01],
-[1.603e+00,-2.661e+00,-4.730e-01,-6.917e+00],
-[-5.571e-02,6.620e-03,9.627e-02,-2.497e-01],
-[-2.672e-03,2.526e-02,1.530e-03,-4.223e-01],
-[-7.064e-03,-6.753e-02,3.117e-03,1.103e-01],
-[-3.755e-03,-6.830e-03,1.481e-03,-2.035e-03],
-[7.095e-04,1.041e-03,3.258e-04,1.836e-02],
-[-1.061e-03,1.163e-03,1.678e-04,-1.595e-03],
-[2.558e-05,2.606e-05,-1.051e-05,-2.257e-03],
-[-2.318e-05,-1.232e-05,1.589e-04,5.626e-04],
-[9.834e-06,-3.570e-05,-4.189e-06,6.126e-04],
-[-7.453e-02,4.846e-01,1.291e-02,2.517e+00],
-[2.158e-04,1.780e-04,-1.974e-04,-9.313e-04],
-[-3.600e-05,5.755e-05,1.223e-05,-2.253e-04],
-[7.320e-06,2.790e-05,-1.339e-06,-1.045e-04]]
-#
-def rsm_models(x):
-	csa = coeff[0][0] + coeff[1][0]*x[0] + coeff[2][0]*x[1] + coeff[3][0]*x[2] + coeff[4][0]*x[3] + coeff[5][0]*x[0]*x[1] + \
-		  coeff[6][0]*x[0]*x[2] + coeff[7][0]*x[0]*x[3] + coeff[8][0]*x[1]*x[2] + coeff[9][0]*x[1]*x[3] + coeff[10][0]*x[2]*x[3] + \
-		  coeff[11][0]*x[0]**2 + coeff[12][0]*x[1]**2 + coeff[13][0]*x[2]**2 + coeff[14][0]*x[3]**2
-	fs = coeff[0][1] + coeff[1][1]*x[0] + coeff[2][1]*x[1] + coeff[3][1]*x[2] + coeff[4][1]*x[3] + coeff[5][1]*x[0]*x[1] + \
-		 coeff[6][1]*x[0]*x[2] + coeff[7][1]*x[0]*x[3] + coeff[8][1]*x[1]*x[2] + coeff[9][1]*x[1]*x[3] + coeff[10][1]*x[2]*x[3] + \
-		 coeff[11][1]*x[0]**2 + coeff[12][1]*x[1]**2 + coeff[13][1]*x[2]**2 + coeff[14][1]*x[3]**2
-	par = coeff[0][2] + coeff[1][2]*x[0] + coeff[2][2]*x[1] + coeff[3][2]*x[2] + coeff[4][2]*x[3] + coeff[5][2]*x[0]*x[1] + \
-		  coeff[6][2]*x[0]*x[2] + coeff[7][2]*x[0]*x[3] + coeff[8][2]*x[1]*x[2] + coeff[9][2]*x[1]*x[3] + coeff[10][2]*x[2]*x[3] + \
-		  coeff[11][2]*x[0]**2 + coeff[12][2]*x[1]**2 + coeff[13][2]*x[2]**2 + coeff[14][2]*x[3]**2
-	rs = coeff[0][3] + coeff[1][3]*x[0] + coeff[2][3]*x[1] + coeff[3][3]*x[2] + coeff[4][3]*x[3] + coeff[5][3]*x[0]*x[1] + \
-		 coeff[6][3]*x[0]*x[2] + coeff[7][3]*x[0]*x[3] + coeff[8][3]*x[1]*x[2] + coeff[9][3]*x[1]*x[3] + coeff[10][3]*x[2]*x[3] + \
-		 coeff[11][3]*x[0]**2 + coeff[12][3]*x[1]**2 + coeff[13][3]*x[2]**2 + coeff[14][3]*x[3]**2
-	return csa, fs, par, rs
+# Refit the empirical models from the response surface matrix instead of using
+# the coefficients in surrogate.py
+refit_models = False
+rsm_data = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rsm', 'rsm.dat')
+if refit_models:
+	set_coeff(fit_rsm(*read_rsm_data(rsm_data))[0])
 #
 # Baseline inputs
 x0 = [1.35,150,150,1050]
@@ -65,9 +47,23 @@ t_bounds = (100,200)
 l_bounds = (900,1200)
 opt_bounds = (ar_bounds,w_bounds,t_bounds,l_bounds)
 #
+# Multi-start settings (starts per objective, worker processes, random seed)
+n_starts = 200
+n_processes = None
+ms_seed = 0
+#
+# Multi-objective settings (population, generations, archive resolution of csa,
+# fs, par, rs)
+pareto_pop = 200
+pareto_gens = 200
+pareto_eps = [0.01,0.05,0.2,0.5]
+#
+# Shared response evaluations of the objectives, constraints and callbacks
+rsm = ResponseCache()
+#
 # Callback function
 def print_callback(x):
-	print x
+	print x, rsm(x)
 #
 # ********************************************************************************
 # Single objective optimisation
@@ -75,36 +71,55 @@ def print_callback(x):
 #
 # Objective functions
 def csa_min(x):
-	return rsm_models(x)[0]
+	return rsm(x)[0]
 def csa_max(x):
-	return -rsm_models(x)[0]
+	return -rsm(x)[0]
 def fs_min(x):
-	return rsm_models(x)[1]
+	return rsm(x)[1]
 def fs_max(x):
-	return -rsm_models(x)[1]
+	return -rsm(x)[1]
 def par_min(x):
-	return rsm_models(x)[2]
+	return rsm(x)[2]
 def par_max(x):
-	return -rsm_models(x)[2]
+	return -rsm(x)[2]
 def rs_min(x):
-	return rsm_models(x)[3]
+	return rsm(x)[3]
 def rs_max(x):
-	return -rsm_models(x)[3]
-#
-# Single objective optimisation
-csa_solo_min = minimize(csa_min, x0, method=opt_method, bounds=opt_bounds)
-csa_solo_max = minimize(csa_max, x0, method=opt_method, bounds=opt_bounds)
-fs_solo_min = minimize(fs_min, x0, method=opt_method, bounds=opt_bounds)
-fs_solo_max = minimize(fs_max, x0, method=opt_method, bounds=opt_bounds)
-par_solo_min = minimize(par_min, x0, method=opt_method, bounds=opt_bounds)
-par_solo_max = minimize(par_max, x0, method=opt_method, bounds=opt_bounds)
-rs_solo_min = minimize(rs_min, x0, method=opt_method, bounds=opt_bounds)
-rs_solo_max = minimize(rs_max, x0, method=opt_method, bounds=opt_bounds)
-#
-csa_solo_opt_bounds = (csa_solo_min.fun, -csa_solo_max.fun)
-fs_solo_opt_bounds = (fs_solo_min.fun, -fs_solo_max.fun)
-par_solo_opt_bounds = (par_solo_min.fun, -par_solo_max.fun)
-rs_solo_opt_bounds = (rs_solo_min.fun, -rs_solo_max.fun)
+	return -rsm(x)[3]
+#
+# Objective gradients
+def csa_min_jac(x):
+	return rsm.jacobian(x)[0]
+def csa_max_jac(x):
+	return -rsm.jacobian(x)[0]
+def fs_min_jac(x):
+	return rsm.jacobian(x)[1]
+def fs_max_jac(x):
+	return -rsm.jacobian(x)[1]
+def par_min_jac(x):
+	return rsm.jacobian(x)[2]
+def par_max_jac(x):
+	return -rsm.jacobian(x)[2]
+def rs_min_jac(x):
+	return rsm.jacobian(x)[3]
+def rs_max_jac(x):
+	return -rsm.jacobian(x)[3]
+#
+# Single objective optimisation (parallel multi-start, baseline inputs as first start)
+if __name__ == '__main__':
+	csa_solo_min = multi_start(csa_min, opt_bounds, n_starts, x0, jac=csa_min_jac, method=opt_method, processes=n_processes, seed=ms_seed)
+	csa_solo_max = multi_start(csa_max, opt_bounds, n_starts, x0, jac=csa_max_jac, method=opt_method, processes=n_processes, seed=ms_seed)
+	fs_solo_min = multi_start(fs_min, opt_bounds, n_starts, x0, jac=fs_min_jac, method=opt_method, processes=n_processes, seed=ms_seed)
+	fs_solo_max = multi_start(fs_max, opt_bounds, n_starts, x0, jac=fs_max_jac, method=opt_method, processes=n_processes, seed=ms_seed)
+	par_solo_min = multi_start(par_min, opt_bounds, n_starts, x0, jac=par_min_jac, method=opt_method, processes=n_processes, seed=ms_seed)
+	par_solo_max = multi_start(par_max, opt_bounds, n_starts, x0, jac=par_max_jac, method=opt_method, processes=n_processes, seed=ms_seed)
+	rs_solo_min = multi_start(rs_min, opt_bounds, n_starts, x0, jac=rs_min_jac, method=opt_method, processes=n_processes, seed=ms_seed)
+	rs_solo_max = multi_start(rs_max, opt_bounds, n_starts, x0, jac=rs_max_jac, method=opt_method, processes=n_processes, seed=ms_seed)
+	#
+	csa_solo_opt_bounds = (csa_solo_min.fun, -csa_solo_max.fun)
+	fs_solo_opt_bounds = (fs_solo_min.fun, -fs_solo_max.fun)
+	par_solo_opt_bounds = (par_solo_min.fun, -par_solo_max.fun)
+	rs_solo_opt_bounds = (rs_solo_min.fun, -rs_solo_max.fun)
 #
 # print csa_solo_opt_bounds
 # print fs_solo_opt_bounds
@@ -116,6 +131,7 @@ rs_solo_opt_bounds = (rs_solo_min.fun, -rs_solo_max.fun)
 # print fs_solo_min.x, rsm_models(fs_solo_min.x)
 # print par_solo_min.x, rsm_models(par_solo_min.x)
 # print rs_solo_min.x, rsm_models(rs_solo_min.x)
+# print len(csa_solo_min.optima), len(fs_solo_min.optima), len(par_solo_min.optima), len(rs_solo_min.optima)
 #
 # ********************************************************************************
 # Constrained baseline optimisation
@@ -125,27 +141,39 @@ x0 = [0.4,200,200,900]
 #
 # Constraints
 def csa_constraint(x):
-	return x1[0] - rsm_models(x)[0]
+	return x1[0] - rsm(x)[0]
 def fs_constraint(x):
-	return x1[1] - rsm_models(x)[1]
+	return x1[1] - rsm(x)[1]
 def par_constraint(x):
-	return x1[2] - rsm_models(x)[2]
+	return x1[2] - rsm(x)[2]
 def rs_constraint(x):
-	return  x1[3] - rsm_models(x)[3]
-csa_const = {'type':'ineq','fun':csa_constraint}
-fs_const = {'type':'ineq','fun':fs_constraint}
-par_const = {'type':'ineq','fun':par_constraint}
-rs_const = {'type':'ineq','fun':rs_constraint}
+	return  x1[3] - rsm(x)[3]
+#
+# Constraint gradients
+def csa_constraint_jac(x):
+	return -rsm.jacobian(x)[0]
+def fs_constraint_jac(x):
+	return -rsm.jacobian(x)[1]
+def par_constraint_jac(x):
+	return -rsm.jacobian(x)[2]
+def rs_constraint_jac(x):
+	return -rsm.jacobian(x)[3]
+#
+csa_const = {'type':'ineq','fun':csa_constraint,'jac':csa_constraint_jac}
+fs_const = {'type':'ineq','fun':fs_constraint,'jac':fs_constraint_jac}
+par_const = {'type':'ineq','fun':par_constraint,'jac':par_constraint_jac}
+rs_const = {'type':'ineq','fun':rs_constraint,'jac':rs_constraint_jac}
 csa_constraints = [fs_const,par_const,rs_const]
 fs_constraints = [csa_const,par_const,rs_const]
 par_constraints = [csa_const,fs_const,rs_const]
 rs_constraints = [csa_const,fs_const,par_const]
 #
-# Constrained baseline optimisation
-csa_cbo_min = minimize(csa_min,x0,method=opt_method,bounds=opt_bounds,constraints=csa_constraints)
-fs_cbo_min = minimize(fs_min,x0,method=opt_method,bounds=opt_bounds,constraints=fs_constraints)
-par_cbo_min = minimize(par_min,x0,method=opt_method,bounds=opt_bounds,constraints=par_constraints)
-rs_cbo_min = minimize(rs_min,x0,method=opt_method,bounds=opt_bounds,constraints=rs_constraints)
+# Constrained baseline optimisation (parallel multi-start)
+if __name__ == '__main__':
+	csa_cbo_min = multi_start(csa_min, opt_bounds, n_starts, x0, jac=csa_min_jac, constraints=csa_constraints, method=opt_method, processes=n_processes, seed=ms_seed)
+	fs_cbo_min = multi_start(fs_min, opt_bounds, n_starts, x0, jac=fs_min_jac, constraints=fs_constraints, method=opt_method, processes=n_processes, seed=ms_seed)
+	par_cbo_min = multi_start(par_min, opt_bounds, n_starts, x0, jac=par_min_jac, constraints=par_constraints, method=opt_method, processes=n_processes, seed=ms_seed)
+	rs_cbo_min = multi_start(rs_min, opt_bounds, n_starts, x0, jac=rs_min_jac, constraints=rs_constraints, method=opt_method, processes=n_processes, seed=ms_seed)
 #
 # Print results
 # print csa_cbo_min.x, rsm_models(csa_cbo_min.x)
@@ -159,50 +187,97 @@ rs_cbo_min = minimize(rs_min,x0,method=opt_method,bounds=opt_bounds,constraints=
 #
 # Normalised linear models
 def csa_norm(x):
-	csa_norm = (rsm_models(x)[0] - csa_solo_opt_bounds[0]) / (csa_solo_opt_bounds[1] - csa_solo_opt_bounds[0])
+	csa_norm = (rsm(x)[0] - csa_solo_opt_bounds[0]) / (csa_solo_opt_bounds[1] - csa_solo_opt_bounds[0])
 	return np.absolute(csa_norm)
 def fs_norm(x):
-	fs_norm = (rsm_models(x)[1] - fs_solo_opt_bounds[0]) / (fs_solo_opt_bounds[1] - fs_solo_opt_bounds[0])
+	fs_norm = (rsm(x)[1] - fs_solo_opt_bounds[0]) / (fs_solo_opt_bounds[1] - fs_solo_opt_bounds[0])
 	return np.absolute(fs_norm)
 def par_norm(x):
-	par_norm = (rsm_models(x)[2] - par_solo_opt_bounds[0]) / (par_solo_opt_bounds[1] - par_solo_opt_bounds[0])
+	par_norm = (rsm(x)[2] - par_solo_opt_bounds[0]) / (par_solo_opt_bounds[1] - par_solo_opt_bounds[0])
 	return np.absolute(par_norm)
 def rs_norm(x):
-	rs_norm = (rsm_models(x)[3] - rs_solo_opt_bounds[0]) / (rs_solo_opt_bounds[1] - rs_solo_opt_bounds[0])
+	rs_norm = (rsm(x)[3] - rs_solo_opt_bounds[0]) / (rs_solo_opt_bounds[1] - rs_solo_opt_bounds[0])
 	return np.absolute(rs_norm)
 #
+# Normalised model gradients (subgradient of the absolute value taken as 0 at 0)
+def csa_norm_jac(x):
+	csa_norm = (rsm(x)[0] - csa_solo_opt_bounds[0]) / (csa_solo_opt_bounds[1] - csa_solo_opt_bounds[0])
+	return np.sign(csa_norm) * rsm.jacobian(x)[0] / (csa_solo_opt_bounds[1] - csa_solo_opt_bounds[0])
+def fs_norm_jac(x):
+	fs_norm = (rsm(x)[1] - fs_solo_opt_bounds[0]) / (fs_solo_opt_bounds[1] - fs_solo_opt_bounds[0])
+	return np.sign(fs_norm) * rsm.jacobian(x)[1] / (fs_solo_opt_bounds[1] - fs_solo_opt_bounds[0])
+def par_norm_jac(x):
+	par_norm = (rsm(x)[2] - par_solo_opt_bounds[0]) / (par_solo_opt_bounds[1] - par_solo_opt_bounds[0])
+	return np.sign(par_norm) * rsm.jacobian(x)[2] / (par_solo_opt_bounds[1] - par_solo_opt_bounds[0])
+def rs_norm_jac(x):
+	rs_norm = (rsm(x)[3] - rs_solo_opt_bounds[0]) / (rs_solo_opt_bounds[1] - rs_solo_opt_bounds[0])
+	return np.sign(rs_norm) * rsm.jacobian(x)[3] / (rs_solo_opt_bounds[1] - rs_solo_opt_bounds[0])
+#
 # Objective function
 def uo_obj_fun(x):
 	return par_norm(x) + rs_norm(x)
+def uo_obj_jac(x):
+	return par_norm_jac(x) + rs_norm_jac(x)
 #
 # Unconstrained optimisation
-uo_opt = minimize(uo_obj_fun,x0,method=opt_method,bounds=opt_bounds)
+if __name__ == '__main__':
+	uo_opt = minimize(uo_obj_fun,x0,method=opt_method,jac=uo_obj_jac,bounds=opt_bounds)
 #
 # Print results
 # print uo_opt.x, rsm_models(uo_opt.x)
+# print rsm
 #
 # ********************************************************************************
 # User-constrained optimisation
 # ********************************************************************************
 #
-# Constraints
-def rs_constraint(x):
-	return -40 - rsm_models(x)[3]
+# Constraints (named apart from the baseline constraints, which worker processes
+# look up by name)
+def rs_user_constraint(x):
+	return -40 - rsm(x)[3]
 def t_constraint(x):
 	return 150 - x[2]
-rs_const = {'type':'ineq','fun':rs_constraint}
-t_const = {'type':'ineq','fun':t_constraint}
-par_const = {'type':'ineq','fun':par_constraint}
-constraints = [rs_const,t_const]
+def rs_user_constraint_jac(x):
+	return -rsm.jacobian(x)[3]
+def t_constraint_jac(x):
+	return np.array([0.0, 0.0, -1.0, 0.0])
+rs_user_const = {'type':'ineq','fun':rs_user_constraint,'jac':rs_user_constraint_jac}
+t_const = {'type':'ineq','fun':t_constraint,'jac':t_constraint_jac}
+par_const = {'type':'ineq','fun':par_constraint,'jac':par_constraint_jac}
+constraints = [rs_user_const,t_const]
 #
 # Objective functions
 def uco_obj_fun(x):
 	return csa_norm(x) + fs_norm(x) + par_norm(x) + rs_norm(x)
+def uco_obj_jac(x):
+	return csa_norm_jac(x) + fs_norm_jac(x) + par_norm_jac(x) + rs_norm_jac(x)
 #
 # User-constrained overall optimisation
-uco_design = minimize(uco_obj_fun,x0,method=opt_method,bounds=opt_bounds,constraints=constraints)
+if __name__ == '__main__':
+	uco_design = minimize(uco_obj_fun,x0,method=opt_method,jac=uco_obj_jac,bounds=opt_bounds,constraints=constraints)
 #
 # Print results
 # print uco_design.x, rsm_models(uco_design.x)
+# print rsm
+#
+# ********************************************************************************
+# Multi-objective optimisation
+# ********************************************************************************
+#
+# Constraint violation of a batch of designs (user constraints)
+def uco_violation(X):
+	return np.maximum(rsm_models_batch(X)[:,3] + 40, 0) + np.maximum(X[:,2] - 150, 0)
+#
+# Pareto front of CSA, FS, PAR and RS (all minimised, as in uco_obj_fun)
+if __name__ == '__main__':
+	pareto_front = nsga2(opt_bounds, pareto_pop, pareto_gens, constraint=uco_violation, seed=ms_seed, eps=pareto_eps)
+	#
+	# Equally weighted trade-off on the front, normalised by the solo optima
+	uco_pareto = pareto_front.best(
+	lower=[csa_solo_opt_bounds[0], fs_solo_opt_bounds[0], par_solo_opt_bounds[0], rs_solo_opt_bounds[0]],
+	upper=[csa_solo_opt_bounds[1], fs_solo_opt_bounds[1], par_solo_opt_bounds[1], rs_solo_opt_bounds[1]])
+#
+# Print results
+# print len(pareto_front), uco_pareto
 #
 # ********************************************************************************
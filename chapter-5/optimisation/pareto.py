@@ -0,0 +1,237 @@
+# ********************************************************************************
+#
+#		Multi-Objective Optimisation
+#
+#		Vectorised NSGA-II search of the response surface models returning the
+#		non-dominated (Pareto) front of CSA, FS, PAR and RS in an array archive.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import numpy as np
+from surrogate import rsm_models_batch
+#
+# ********************************************************************************
+# Dominance
+# ********************************************************************************
+#
+# Dominance matrix D[i,j] = row i of A dominates row j of B (minimisation); with
+# weak=True rows equal to a row of A also count as dominated
+def dominance(A, B, weak=False):
+	le = A[:,None,0] <= B[None,:,0]
+	lt = A[:,None,0] < B[None,:,0]
+	for k in range(1, A.shape[1]):
+		le &= A[:,None,k] <= B[None,:,k]
+		if not weak:
+			lt |= A[:,None,k] < B[None,:,k]
+	return le if weak else le & lt
+#
+# Mask of rows of B not dominated by any row of A (in blocks to bound memory)
+def not_dominated(A, B, weak=False, block=2000):
+	mask = np.ones(len(B), dtype=bool)
+	for i in range(0, len(A), block):
+		for j in range(0, len(B), block):
+			mask[j:j+block] &= ~np.any(dominance(A[i:i+block], B[j:j+block], weak), axis=0)
+	return mask
+#
+# Mask of the non-dominated rows of F
+def non_dominated(F):
+	return not_dominated(F, F)
+#
+# ********************************************************************************
+# Archive
+# ********************************************************************************
+#
+# Non-dominated designs X (n, n_vars) and responses F (n, n_obj); senses are +1
+# for minimised and -1 for maximised responses. With eps (per response) the
+# archive keeps one design per eps-box, which bounds its size on four-response
+# fronts where almost every design is non-dominated.
+class ParetoArchive(object):
+	def __init__(self, n_vars=4, n_obj=4, senses=None, eps=None):
+		self.X = np.empty((0, n_vars))
+		self.F = np.empty((0, n_obj))
+		if senses is None:
+			senses = np.ones(n_obj)
+		self.senses = np.asarray(senses, dtype=float)
+		self.eps = None if eps is None else np.asarray(eps, dtype=float)
+	#
+	def __len__(self):
+		return len(self.X)
+	#
+	# Minimised responses (eps-box corners when eps is set)
+	def _key(self, F):
+		G = F * self.senses
+		if self.eps is not None:
+			G = np.floor(G / self.eps)
+		return G
+	#
+	# Merge new designs, keeping only the non-dominated set (new designs are only
+	# compared with each other and with the archive)
+	def add(self, X, F):
+		X = np.atleast_2d(np.asarray(X, dtype=float))
+		F = np.atleast_2d(np.asarray(F, dtype=float))
+		G = self._key(F)
+		# New designs: non-dominated among themselves, one per box
+		keep = non_dominated(G)
+		X, F, G = X[keep], F[keep], G[keep]
+		G, first = np.unique(G, axis=0, return_index=True)
+		X, F = X[first], F[first]
+		# Designs not (weakly) dominated by the archive replace those they dominate
+		A = self._key(self.F)
+		keep = not_dominated(A, G, weak=True)
+		X, F, G = X[keep], F[keep], G[keep]
+		if len(G):
+			old = not_dominated(G, A, weak=self.eps is not None)
+			self.X = np.vstack((self.X[old], X))
+			self.F = np.vstack((self.F[old], F))
+		return len(X)
+	#
+	# Designs whose responses lie inside [lower, upper] (None or NaN for no limit)
+	def select(self, lower=None, upper=None):
+		mask = np.ones(len(self.F), dtype=bool)
+		if lower is not None:
+			lower = np.asarray(lower, dtype=float)
+			mask &= np.all((self.F >= lower) | np.isnan(lower), axis=1)
+		if upper is not None:
+			upper = np.asarray(upper, dtype=float)
+			mask &= np.all((self.F <= upper) | np.isnan(upper), axis=1)
+		return self.X[mask], self.F[mask]
+	#
+	# Best trade-off for the given weights: minimum weighted sum of the responses
+	# normalised between lower and upper (default the extent of the front)
+	def best(self, weights=None, lower=None, upper=None):
+		if lower is None:
+			lower = np.where(self.senses > 0, self.F.min(axis=0), self.F.max(axis=0))
+		if upper is None:
+			upper = np.where(self.senses > 0, self.F.max(axis=0), self.F.min(axis=0))
+		if weights is None:
+			weights = np.ones(self.F.shape[1])
+		norm = np.absolute((self.F - lower) / (np.asarray(upper) - np.asarray(lower)))
+		i = np.argmin(np.dot(norm, weights))
+		return self.X[i], self.F[i]
+	#
+	# The eps-box size is saved when set, so a loaded archive stays bounded
+	def save(self, path):
+		arrays = {'X':self.X, 'F':self.F, 'senses':self.senses}
+		if self.eps is not None:
+			arrays['eps'] = self.eps
+		np.savez(path, **arrays)
+	#
+	@classmethod
+	def load(cls, path):
+		data = np.load(path)
+		eps = data['eps'] if 'eps' in data.files else None
+		archive = cls(data['X'].shape[1], data['F'].shape[1], data['senses'], eps)
+		archive.X = data['X']
+		archive.F = data['F']
+		return archive
+#
+# ********************************************************************************
+# NSGA-II
+# ********************************************************************************
+#
+# Non-dominated sorting rank of each row of F, with constraint violation v
+# (feasible designs before infeasible, infeasible ordered by violation)
+def pareto_ranks(F, v):
+	feasible = v <= 0
+	D = dominance(F, F) & feasible[:,None] & feasible[None,:]
+	D |= feasible[:,None] & ~feasible[None,:]
+	D |= ~feasible[:,None] & ~feasible[None,:] & (v[:,None] < v[None,:])
+	count = D.sum(axis=0)
+	rank = np.full(len(F), -1)
+	front = np.flatnonzero(count == 0)
+	r = 0
+	while len(front):
+		rank[front] = r
+		count -= D[front].sum(axis=0)
+		count[front] = -1
+		front = np.flatnonzero(count == 0)
+		r += 1
+	return rank
+#
+# Crowding distance of each row of F within its rank
+def crowding(F, rank):
+	dist = np.zeros(len(F))
+	for r in np.unique(rank):
+		idx = np.flatnonzero(rank == r)
+		if len(idx) < 3:
+			dist[idx] = np.inf
+			continue
+		Fr = F[idx]
+		order = np.argsort(Fr, axis=0)
+		Fs = np.take_along_axis(Fr, order, axis=0)
+		span = Fs[-1] - Fs[0]
+		span[span == 0] = 1.0
+		d = np.zeros_like(Fs)
+		d[1:-1] = (Fs[2:] - Fs[:-2]) / span
+		d[0] = d[-1] = np.inf
+		contrib = np.zeros_like(Fs)
+		np.put_along_axis(contrib, order, d, axis=0)
+		dist[idx] = contrib.sum(axis=1)
+	return dist
+#
+# Binary tournament on (rank, crowding distance)
+def tournament(rank, dist, n, rng):
+	a = rng.randint(len(rank), size=n)
+	b = rng.randint(len(rank), size=n)
+	better = (rank[a] < rank[b]) | ((rank[a] == rank[b]) & (dist[a] > dist[b]))
+	return np.where(better, a, b)
+#
+# Simulated binary crossover and polynomial mutation within [lb, ub]
+def variation(P, lb, ub, rng, eta_c=15.0, eta_m=20.0, p_c=0.9, p_m=None):
+	n, k = P.shape
+	if p_m is None:
+		p_m = 1.0 / k
+	P1, P2 = P[0::2], P[1::2]
+	m = min(len(P1), len(P2))
+	P1, P2 = P1[:m], P2[:m]
+	u = rng.rand(m, k)
+	beta = np.where(u <= 0.5, (2*u)**(1/(eta_c+1)), (1/(2*(1-u)))**(1/(eta_c+1)))
+	cross = (rng.rand(m, 1) < p_c) & (rng.rand(m, k) < 0.5)
+	beta = np.where(cross, beta, 1.0)
+	C1 = 0.5 * ((1+beta)*P1 + (1-beta)*P2)
+	C2 = 0.5 * ((1-beta)*P1 + (1+beta)*P2)
+	C = np.vstack((C1, C2, P[2*m:]))
+	u = rng.rand(*C.shape)
+	delta = np.where(u < 0.5, (2*u)**(1/(eta_m+1)) - 1, 1 - (2*(1-u))**(1/(eta_m+1)))
+	mutate = rng.rand(*C.shape) < p_m
+	C = C + np.where(mutate, delta * (ub - lb), 0.0)
+	return np.clip(C, lb, ub)
+#
+# Pareto front of the response surface models (columns: csa, fs, par, rs) within
+# bounds. constraint(X) returns the (N,) constraint violation of a batch of
+# designs (<= 0 feasible). All evaluated feasible designs are offered to the
+# archive, which is returned (eps sets the archive resolution per response).
+def nsga2(bounds, pop_size=200, generations=200, senses=None, constraint=None,
+c=None, seed=None, eps=None, archive=None):
+	rng = np.random.RandomState(seed)
+	lb, ub = np.array(bounds, dtype=float).T
+	if archive is None:
+		archive = ParetoArchive(len(lb), 4, senses, eps)
+	#
+	def evaluate(X):
+		F = rsm_models_batch(X, c)
+		v = np.zeros(len(X)) if constraint is None else np.asarray(constraint(X), dtype=float)
+		archive.add(X[v <= 0], F[v <= 0])
+		return F * archive.senses, v
+	#
+	X = lb + (ub - lb) * rng.rand(pop_size, len(lb))
+	F, v = evaluate(X)
+	rank = pareto_ranks(F, v)
+	dist = crowding(F, rank)
+	for g in range(generations):
+		parents = X[tournament(rank, dist, pop_size, rng)]
+		Xc = variation(parents, lb, ub, rng)
+		Fc, vc = evaluate(Xc)
+		# Elitist survival of the best pop_size of parents and offspring
+		X, F, v = np.vstack((X, Xc)), np.vstack((F, Fc)), np.concatenate((v, vc))
+		rank = pareto_ranks(F, v)
+		dist = crowding(F, rank)
+		survivors = np.lexsort((-dist, rank))[:pop_size]
+		X, F, v = X[survivors], F[survivors], v[survivors]
+		rank, dist = rank[survivors], dist[survivors]
+	return archive
+#
+# ********************************************************************************
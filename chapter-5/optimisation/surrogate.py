@@ -0,0 +1,173 @@
+# ********************************************************************************
+#
+#		Response Surface Models
+#
+#		Empirical (quadratic) models of CSA, FS, PAR and RS generated from the LHC
+#		sampling plan, with scalar and batch (vectorised) evaluators.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+from collections import OrderedDict
+import numpy as np
+#
+# ********************************************************************************
+# Model coefficients
+# ********************************************************************************
+#
+# Empirical model coefficients (rows: 1, a, b, c, d, ab, ac, ad, bc, bd, cd, aa, bb,
+# cc, dd; columns: csa, fs, par, rs)
+coeff = [[-2.614,4.488e+01,-1.115e+00,-2.525e+01],
+[1.603e+00,-2.661e+00,-4.730e-01,-6.917e+00],
+[-5.571e-02,6.620e-03,9.627e-02,-2.497e-01],
+[-2.672e-03,2.526e-02,1.530e-03,-4.223e-01],
+[-7.064e-03,-6.753e-02,3.117e-03,1.103e-01],
+[-3.755e-03,-6.830e-03,1.481e-03,-2.035e-03],
+[7.095e-04,1.041e-03,3.258e-04,1.836e-02],
+[-1.061e-03,1.163e-03,1.678e-04,-1.595e-03],
+[2.558e-05,2.606e-05,-1.051e-05,-2.257e-03],
+[-2.318e-05,-1.232e-05,1.589e-04,5.626e-04],
+[9.834e-06,-3.570e-05,-4.189e-06,6.126e-04],
+[-7.453e-02,4.846e-01,1.291e-02,2.517e+00],
+[2.158e-04,1.780e-04,-1.974e-04,-9.313e-04],
+[-3.600e-05,5.755e-05,1.223e-05,-2.253e-04],
+[7.320e-06,2.790e-05,-1.339e-06,-1.045e-04]]
+#
+# Interaction terms (variable pairs) in coefficient row order
+interactions = ((0,1),(0,2),(0,3),(1,2),(1,3),(2,3))
+#
+# ********************************************************************************
+# Scalar evaluator
+# ********************************************************************************
+#
+def rsm_models(x):
+	csa = coeff[0][0] + coeff[1][0]*x[0] + coeff[2][0]*x[1] + coeff[3][0]*x[2] + coeff[4][0]*x[3] + coeff[5][0]*x[0]*x[1] + \
+		  coeff[6][0]*x[0]*x[2] + coeff[7][0]*x[0]*x[3] + coeff[8][0]*x[1]*x[2] + coeff[9][0]*x[1]*x[3] + coeff[10][0]*x[2]*x[3] + \
+		  coeff[11][0]*x[0]**2 + coeff[12][0]*x[1]**2 + coeff[13][0]*x[2]**2 + coeff[14][0]*x[3]**2
+	fs = coeff[0][1] + coeff[1][1]*x[0] + coeff[2][1]*x[1] + coeff[3][1]*x[2] + coeff[4][1]*x[3] + coeff[5][1]*x[0]*x[1] + \
+		 coeff[6][1]*x[0]*x[2] + coeff[7][1]*x[0]*x[3] + coeff[8][1]*x[1]*x[2] + coeff[9][1]*x[1]*x[3] + coeff[10][1]*x[2]*x[3] + \
+		 coeff[11][1]*x[0]**2 + coeff[12][1]*x[1]**2 + coeff[13][1]*x[2]**2 + coeff[14][1]*x[3]**2
+	par = coeff[0][2] + coeff[1][2]*x[0] + coeff[2][2]*x[1] + coeff[3][2]*x[2] + coeff[4][2]*x[3] + coeff[5][2]*x[0]*x[1] + \
+		  coeff[6][2]*x[0]*x[2] + coeff[7][2]*x[0]*x[3] + coeff[8][2]*x[1]*x[2] + coeff[9][2]*x[1]*x[3] + coeff[10][2]*x[2]*x[3] + \
+		  coeff[11][2]*x[0]**2 + coeff[12][2]*x[1]**2 + coeff[13][2]*x[2]**2 + coeff[14][2]*x[3]**2
+	rs = coeff[0][3] + coeff[1][3]*x[0] + coeff[2][3]*x[1] + coeff[3][3]*x[2] + coeff[4][3]*x[3] + coeff[5][3]*x[0]*x[1] + \
+		 coeff[6][3]*x[0]*x[2] + coeff[7][3]*x[0]*x[3] + coeff[8][3]*x[1]*x[2] + coeff[9][3]*x[1]*x[3] + coeff[10][3]*x[2]*x[3] + \
+		 coeff[11][3]*x[0]**2 + coeff[12][3]*x[1]**2 + coeff[13][3]*x[2]**2 + coeff[14][3]*x[3]**2
+	return csa, fs, par, rs
+#
+# ********************************************************************************
+# Batch evaluator
+# ********************************************************************************
+#
+# Quadratic feature matrix (N, 15) of an (N, 4) array of designs
+def rsm_features(X):
+	X = np.atleast_2d(np.asarray(X, dtype=float))
+	F = np.empty((X.shape[0], 15))
+	F[:,0] = 1.0
+	F[:,1:5] = X
+	for k, (i, j) in enumerate(interactions):
+		np.multiply(X[:,i], X[:,j], out=F[:,5+k])
+	np.square(X, out=F[:,11:15])
+	return F
+#
+# Responses (N, 4) of an (N, 4) array of designs (columns: csa, fs, par, rs)
+def rsm_models_batch(X, c=None):
+	if c is None:
+		c = coeff
+	return np.dot(rsm_features(X), np.asarray(c, dtype=float))
+#
+# ********************************************************************************
+# Gradients and Hessians
+# ********************************************************************************
+#
+# Hessians (4 responses, 4, 4) of the quadratic models, constant in x
+def rsm_hessians(c=None):
+	if c is None:
+		c = coeff
+	c = np.asarray(c, dtype=float)
+	H = np.zeros((4, 4, 4))
+	for k, (i, j) in enumerate(interactions):
+		H[:,i,j] = c[5+k]
+		H[:,j,i] = c[5+k]
+	for i in range(4):
+		H[:,i,i] = 2.0 * c[11+i]
+	return H
+#
+# Linear terms (4 responses, 4 variables) and Hessians of the default coefficients
+rsm_lin = np.transpose(np.asarray(coeff)[1:5])
+rsm_hess = rsm_hessians()
+#
+# Jacobian (4 responses, 4 variables) of the response surface models at x
+def rsm_jacobian(x, c=None):
+	if c is None:
+		return rsm_lin + np.dot(rsm_hess, x)
+	c = np.asarray(c, dtype=float)
+	return np.transpose(c[1:5]) + np.dot(rsm_hessians(c), x)
+#
+# Replace the model coefficients in place (e.g. with a refit from rsm_fit.py), so
+# that modules holding coeff, rsm_lin or rsm_hess see the new models
+def set_coeff(c):
+	c = np.asarray(c, dtype=float)
+	coeff[:] = c.tolist()
+	rsm_lin[...] = np.transpose(c[1:5])
+	rsm_hess[...] = rsm_hessians(c)
+#
+# ********************************************************************************
+# Evaluation context
+# ********************************************************************************
+#
+# Shares the responses and Jacobian of each distinct design between objectives,
+# constraints and callbacks, keeping the most recent maxsize designs (LRU). Each
+# worker process holds its own copy, so counters only cover this process.
+class ResponseCache(object):
+	def __init__(self, c=None, maxsize=32):
+		self.c = c
+		self.maxsize = maxsize
+		self.hits = 0
+		self.misses = 0
+		self.jac_hits = 0
+		self.jac_misses = 0
+		self._entries = OrderedDict()
+	#
+	# Cache entry of x (most recently used last), created on a miss
+	def _entry(self, x):
+		key = np.asarray(x, dtype=float).tobytes()
+		entry = self._entries.pop(key, None)
+		if entry is None:
+			entry = {'x':np.array(x, dtype=float)}
+			if len(self._entries) >= self.maxsize:
+				self._entries.popitem(last=False)
+		self._entries[key] = entry
+		return entry
+	#
+	# Responses (csa, fs, par, rs) at x
+	def __call__(self, x):
+		entry = self._entry(x)
+		if 'f' in entry:
+			self.hits += 1
+		else:
+			self.misses += 1
+			entry['f'] = rsm_models_batch(entry['x'], self.c)[0]
+		return entry['f']
+	#
+	# Jacobian (4 responses, 4 variables) at x
+	def jacobian(self, x):
+		entry = self._entry(x)
+		if 'J' in entry:
+			self.jac_hits += 1
+		else:
+			self.jac_misses += 1
+			entry['J'] = rsm_jacobian(entry['x'], self.c)
+		return entry['J']
+	#
+	def clear(self):
+		self._entries.clear()
+		self.hits = self.misses = self.jac_hits = self.jac_misses = 0
+	#
+	def __repr__(self):
+		return 'ResponseCache(hits={0}, misses={1}, jac_hits={2}, jac_misses={3})'.format(
+		self.hits, self.misses, self.jac_hits, self.jac_misses)
+#
+# ********************************************************************************
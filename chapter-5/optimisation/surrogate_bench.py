@@ -0,0 +1,53 @@
+# ********************************************************************************
+#
+#		Response Surface Benchmark
+#
+#		Checks the batch evaluator against the scalar response surface models and
+#		reports the per-point evaluation cost for increasing sweep sizes.
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import timeit
+import numpy as np
+from surrogate import rsm_models, rsm_models_batch
+#
+# ********************************************************************************
+# User inputs
+# ********************************************************************************
+#
+# Input parameter bounds (ar, w, t, l)
+lb = np.array([0.4, 100, 100, 900])
+ub = np.array([2.3, 200, 200, 1200])
+#
+# Sweep sizes and largest size evaluated with the scalar models
+sweep_sizes = [1, 1000, 1000000]
+scalar_max = 10000
+#
+# ********************************************************************************
+# Benchmark
+# ********************************************************************************
+#
+rng = np.random.RandomState(0)
+#
+# Per-point cost (s) of the fastest of several repeats
+def per_point(fun, n, repeats):
+	return min(timeit.repeat(fun, number=1, repeat=repeats)) / n
+#
+print('{0:>10} {1:>14} {2:>14} {3:>10} {4:>12}'.format(
+'N', 'scalar (us)', 'batch (us)', 'speed-up', 'max error'))
+for n in sweep_sizes:
+	X = lb + (ub - lb) * rng.rand(n, 4)
+	repeats = 3 if n >= 100000 else 20
+	t_batch = per_point(lambda: rsm_models_batch(X), n, repeats)
+	Y = rsm_models_batch(X)
+	# Scalar path on (at most) the first scalar_max designs
+	m = min(n, scalar_max)
+	t_scalar = per_point(lambda: [rsm_models(x) for x in X[:m]], m, 3)
+	error = np.max(np.abs(np.array([rsm_models(x) for x in X[:m]]) - Y[:m]))
+	print('{0:>10d} {1:>14.3f} {2:>14.4f} {3:>10.0f} {4:>12.2e}'.format(
+	n, t_scalar * 1e6, t_batch * 1e6, t_scalar / t_batch, error))
+#
+# ********************************************************************************
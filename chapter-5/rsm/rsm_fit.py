@@ -0,0 +1,170 @@
+# ********************************************************************************
+#
+#		Response Surface Methodology (RSM)
+#
+#		Reads the data from a response surface matrix and fits the quadratic
+# 		empirical models of all responses with a single least-squares solve
+#
+#		Author: Ross Blair
+# 		Date:	18/10/26
+#
+# ********************************************************************************
+#
+import os
+import sys
+import numpy as np
+from scipy.linalg import solve_triangular
+#
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'optimisation'))
+from surrogate import rsm_features
+#
+# ********************************************************************************
+# User inputs
+# ********************************************************************************
+#
+# Response surface matrix (columns: ar, w, t, l, csa, fs, sar, rcp, order)
+rsm_data = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rsm.dat')
+#
+# Response names (coefficient table columns)
+responses = ['csa', 'fs', 'par', 'rs']
+#
+# ********************************************************************************
+# Read data
+# ********************************************************************************
+#
+# Inputs (N, 4) and responses (N, 4) of the response surface matrix
+def read_rsm_data(path):
+	with open(path, 'rb') as dataFile:
+		lines = dataFile.read().decode('latin-1').splitlines()[1:]
+	m = np.array([line.split() for line in lines if line.strip()], dtype=float)
+	return m[:,0:4], m[:,4:8]
+#
+# ********************************************************************************
+# Fit models
+# ********************************************************************************
+#
+# Coefficients (15, n_responses) in rsm_models order (1, a, b, c, d, ab, ac, ad, bc,
+# bd, cd, aa, bb, cc, dd) and R squared of each response
+def fit_rsm(X, Y):
+	F = rsm_features(X)
+	Y = np.asarray(Y, dtype=float)
+	C = np.linalg.lstsq(F, Y, rcond=None)[0]
+	ss_res = np.sum((Y - np.dot(F, C))**2, axis=0)
+	ss_tot = np.sum((Y - Y.mean(axis=0))**2, axis=0)
+	return C, 1.0 - ss_res / ss_tot
+#
+# Insert the row f (and responses y) into the triangular factor R (and Q'Y) in
+# place with Givens rotations
+def givens_insert(R, f, QtY=None, y=None):
+	f = np.array(f, dtype=float)
+	if y is not None:
+		y = np.array(y, dtype=float)
+	for k in range(len(f)):
+		if f[k] == 0.0:
+			continue
+		r = np.hypot(R[k,k], f[k])
+		c, s = R[k,k] / r, f[k] / r
+		Rk = R[k,k:].copy()
+		R[k,k:] = c * Rk + s * f[k:]
+		f[k:] = c * f[k:] - s * Rk
+		if y is not None:
+			Qk = QtY[k].copy()
+			QtY[k] = c * Qk + s * y
+			y = c * y - s * Qk
+#
+# Leverage f(x)'(F'F)^-1 f(x) of designs X for the triangular factor R of F
+# (prediction variance per unit noise)
+def leverage(R, X):
+	Z = solve_triangular(R, rsm_features(X).T, trans='T')
+	return np.sum(Z**2, axis=0)
+#
+# Least-squares fit updated one result at a time. The triangular factor R of the
+# design matrix and Q'Y are updated by Givens rotations (rank-one row insertion),
+# so each new result costs O(p^2) and coefficients are available as soon as the
+# design matrix has full rank.
+class IncrementalFit(object):
+	def __init__(self, n_terms=15, n_responses=4):
+		self.R = np.zeros((n_terms, n_terms))
+		self.QtY = np.zeros((n_terms, n_responses))
+		self.X = np.empty((0, 4))
+		self.Y = np.empty((0, n_responses))
+		self.changes = []
+		self._coeff = None
+		self._designs = set()
+	#
+	# Add one result (design x, responses y)
+	def add(self, x, y):
+		self._designs.add(tuple(float(v) for v in np.ravel(x)))
+		givens_insert(self.R, rsm_features(x)[0], self.QtY, y)
+		self.X = np.vstack((self.X, x))
+		self.Y = np.vstack((self.Y, y))
+		self._update_coeff()
+	#
+	def add_rows(self, X, Y):
+		for x, y in zip(np.atleast_2d(X), np.atleast_2d(Y)):
+			self.add(x, y)
+	#
+	# Add the results (X, Y) of designs not yet added, so all the results so far
+	# (such as ResultsStore.load_xy()) may be passed each time. A design re-run
+	# or replaced keeps its first result.
+	def update(self, X, Y):
+		n = 0
+		for x, y in zip(np.atleast_2d(X), np.atleast_2d(Y)):
+			if tuple(float(v) for v in x) not in self._designs:
+				self.add(x, y)
+				n += 1
+		return n
+	#
+	# Solve R C = Q'Y once R has full rank, recording the change in the predicted
+	# responses at the results so far (as a fraction of each response range)
+	def _update_coeff(self):
+		d = np.abs(np.diag(self.R))
+		if len(self.X) < len(d) or d.min() <= 1e-10 * d.max():
+			return
+		C = solve_triangular(self.R, self.QtY)
+		if self._coeff is not None:
+			F = rsm_features(self.X)
+			span = np.ptp(self.Y, axis=0)
+			span[span == 0] = 1.0
+			self.changes.append(np.max(np.abs(np.dot(F, C - self._coeff)) / span))
+		self._coeff = C
+	#
+	# Coefficients (15, n_responses) in rsm_models order, None until full rank
+	def coeff(self):
+		return self._coeff
+	#
+	# True once the last window updates each moved the predictions by less than tol
+	def converged(self, tol=0.01, window=3):
+		return len(self.changes) >= window and max(self.changes[-window:]) < tol
+	#
+	def leverage(self, X):
+		return leverage(self.R, X)
+	#
+	# Leave-one-out (PRESS) RMS error of each response as a fraction of its range,
+	# None until there are more results than terms
+	def loo_error(self):
+		if self._coeff is None or len(self.X) <= len(self.R):
+			return None
+		e = self.Y - np.dot(rsm_features(self.X), self._coeff)
+		h = np.minimum(self.leverage(self.X), 1.0 - 1e-12)
+		press = np.sqrt(np.mean((e / (1.0 - h)[:,None])**2, axis=0))
+		span = np.ptp(self.Y, axis=0)
+		span[span == 0] = 1.0
+		return press / span
+#
+# Coefficient table as a Python literal (as used for coeff in surrogate.py)
+def format_coeff(C):
+	rows = ['[' + ','.join('{0:.3e}'.format(v) for v in row) + ']' for row in C]
+	return 'coeff = [' + ',\n'.join(rows) + ']'
+#
+# ********************************************************************************
+# Output
+# ********************************************************************************
+#
+if __name__ == '__main__':
+	X, Y = read_rsm_data(rsm_data)
+	C, r2 = fit_rsm(X, Y)
+	print(format_coeff(C))
+	print('R SQUARED (' + ', '.join(responses) + ') = ' + ', '.join('{0:.3f}'.format(v) for v in r2))
+#
+# ********************************************************************************